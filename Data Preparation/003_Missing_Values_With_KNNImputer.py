@@ -27,4 +27,18 @@ knn_imputer = KNNImputer(n_neighbors=3)
 knn_imputer = KNNImputer(n_neighbors=3, weights="distance")
 knn_imputer.fit_transform(my_df)
 
-my_df3 = pd.DataFrame(knn_imputer.fit_transform(my_df),columns=my_df.columns)# Converting Array to Dataframe
\ No newline at end of file
+my_df3 = pd.DataFrame(knn_imputer.fit_transform(my_df),columns=my_df.columns)# Converting Array to Dataframe
+
+
+
+# KNN imputation at scale - neighbour index over complete rows, imputed in blocks across threads
+# (same results as KNNImputer)
+
+import sys
+sys.path.append("..")
+
+from ml_toolkit.knn_imputation import IndexedKNNImputer
+
+knn_imputer = IndexedKNNImputer(n_neighbors=3, weights="distance")
+
+my_df4 = knn_imputer.fit_transform(my_df)
@@ -4,24 +4,14 @@
 
 ###################################
 
-import pandas as pd 
-outlier_columns =["input1","input2"]
+import pandas as pd
+
+import sys
+sys.path.append("..")
+
+from ml_toolkit.outliers import remove_outliers
+
 
-#  Box Plot approach
-
-for column in outlier_columns:
-    
-    lower_quartile =my_df[column].quantile(0.25)
-    upper_quartile =my_df[column].quantile(0.75)
-    iqr = upper_quartile - lower_quartile
-    extended_iqr = iqr * 1.5
-    min_border = lower_quartile - extended_iqr
-    max_border = upper_quartile + extended_iqr
-    
-    outliers = my_df[(my_df[column]< min_border) | (my_df[column]> max_border)].index
-    print(f"{len(outliers)} Outliers dectected in column {column}")
-    
-    my_df.drop(outliers,inplace=True)
 my_df = pd.DataFrame({"input1" : [15,41,44,47,50,53,56,59,99],
                       "input2" : [29,41,44,47,50,53,56,59,66]})
 
@@ -31,33 +21,16 @@ my_df = pd.DataFrame({"input1" : [15,41,44,47,50,53,56,59,99],
 my_df.plot(kind="box",vert=False)
 
 
-    
-    
-    
-# Standard Deviation Approach
-
 outlier_columns =["input1","input2"]
 
+# Each column's borders are computed on the rows the previous columns kept, as
+# the column by column loop did (sequential = False computes every border in
+# one pass and applies a single combined mask)
 
-for column in outlier_columns:
-    
-    mean = my_df[column].mean()
-    std_dev  = my_df[column].std()
-    
-    min_border = mean - std_dev * 2
-    max_border = mean + std_dev * 2 
-    
-    
-    outliers = my_df[(my_df[column]< min_border) | (my_df[column]> max_border)].index
-    print(f"{len(outliers)} Outliers dectected in column {column}")
-    
-    my_df.drop(outliers,inplace=True)
-
-
-
-
-
+my_df_box_plot = remove_outliers(my_df, outlier_columns, method = "iqr", factor = 1.5, sequential = True)
 
 
 
+# Standard Deviation Approach
 
+my_df_std_dev = remove_outliers(my_df, outlier_columns, method = "std", factor = 2, sequential = True)
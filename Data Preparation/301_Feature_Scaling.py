@@ -27,4 +27,24 @@ from sklearn.preprocessing import MinMaxScaler
 
 scale_norm = MinMaxScaler()
 scale_norm.fit_transform(my_df)
-my_df_normalised =pd.DataFrame(scale_norm.fit_transform(my_df), columns=my_df.columns)
\ No newline at end of file
+my_df_normalised =pd.DataFrame(scale_norm.fit_transform(my_df), columns=my_df.columns)
+
+
+
+#Streaming Standardisation and Normalisation (for data that does not fit in memory)
+
+import sys
+sys.path.append("..")
+
+from ml_toolkit.scaling import StreamingScaler
+
+chunks = [my_df.iloc[0:2], my_df.iloc[2:5]]
+
+scale_standard_streaming = StreamingScaler(method = "standard")
+scale_standard_streaming.fit_chunks(chunks)
+my_df_standardised_streaming = pd.DataFrame(scale_standard_streaming.transform(my_df), columns=my_df.columns)
+
+scale_norm_streaming = StreamingScaler(method = "minmax")
+for chunk in chunks:
+    scale_norm_streaming.partial_fit(chunk)
+my_df_normalised_streaming = pd.DataFrame(scale_norm_streaming.transform(my_df), columns=my_df.columns)
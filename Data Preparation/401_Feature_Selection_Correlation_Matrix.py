@@ -9,4 +9,22 @@ import pandas as pd
 
 my_df = pd.read_csv("feature_selection_sample_data.csv")
 
-correlation_matrix = my_df.corr()
\ No newline at end of file
+correlation_matrix = my_df.corr()
+
+
+
+# Wide feature sets - only the strongly correlated pairs, computed tile by tile
+# (no p x p matrix is built)
+
+import sys
+sys.path.append("..")
+
+from ml_toolkit.correlation import correlated_pairs, top_correlated, propose_drops
+
+X = my_df.drop(["output"],axis =1)
+
+correlated_edges = correlated_pairs(X, threshold = 0.8)
+
+strongest_partners = top_correlated(X, k = 2)
+
+columns_to_drop = propose_drops(correlated_edges)
@@ -56,34 +56,28 @@ X_new1 = X.loc[:,feature_selector.get_support()]
 
 import pandas as pd
 
-my_df = pd.read_csv("feature_selection_sample_data.csv")
+import sys
+sys.path.append("..")
 
-from sklearn.feature_selection import SelectKBest ,f_regression
+from ml_toolkit.univariate import UnivariateScreen, select_features
+
+my_df = pd.read_csv("feature_selection_sample_data.csv")
 
 X = my_df.drop(["output"],axis =1)
 
 y = my_df["output"]
 
-feature_selector = SelectKBest(f_regression, k="all")
-
-fit = feature_selector.fit(X,y)
+# F-scores and p-values for every feature from one pass of matrix products
+# (same values as SelectKBest(f_regression); fit_chunks accepts (X, y) chunks for data that does not fit in memory)
 
+screen = UnivariateScreen("f_regression").fit(X,y)
 
-
-p_values = pd.DataFrame(fit.pvalues_)
-scores = pd.DataFrame(fit.scores_)
-input_variable_names = pd.DataFrame(X.columns)
-
-summary_stats = pd.concat([input_variable_names,p_values,scores], axis= 1)
-summary_stats.columns = ["input_variable","p_value","f_score"]
-summary_stats.sort_values(by = "p_value", inplace =True)
+summary_stats = screen.summary()
 
 p_value_threshold = 0.05 
 score_threshold = 5
 
-selected_variables = summary_stats.loc[(summary_stats["f_score"]>= score_threshold) & (summary_stats["p_value"]<= p_value_threshold)]
-
-selected_variables = selected_variables["input_variable"].tolist()
+selected_variables = select_features(summary_stats, p_value_threshold, score_threshold)
 
 X_new = X[selected_variables]
 
@@ -92,33 +86,26 @@ X_new = X[selected_variables]
 
 import pandas as pd
 
-my_df = pd.read_csv("feature_selection_sample_data.csv")
+import sys
+sys.path.append("..")
 
-from sklearn.feature_selection import SelectKBest ,chi2
+from ml_toolkit.univariate import UnivariateScreen, select_features
+
+my_df = pd.read_csv("feature_selection_sample_data.csv")
 
 X = my_df.drop(["output"],axis =1)
 
 y = my_df["output"]
 
-feature_selector = SelectKBest(chi2, k="all")
-
-fit = feature_selector.fit(X,y)
-
-
+# chi2 scores and p-values for every feature (same values as SelectKBest(chi2))
 
-p_values = pd.DataFrame(fit.pvalues_)
-scores = pd.DataFrame(fit.scores_)
-input_variable_names = pd.DataFrame(X.columns)
+screen = UnivariateScreen("chi2").fit(X,y)
 
-summary_stats = pd.concat([input_variable_names,p_values,scores], axis= 1)
-summary_stats.columns = ["input_variable","p_value","chi2_score"]
-summary_stats.sort_values(by = "p_value", inplace =True)
+summary_stats = screen.summary()
 
 p_value_threshold = 0.05 
 score_threshold = 5
 
-selected_variables = summary_stats.loc[(summary_stats["chi2_score"]>= score_threshold) & (summary_stats["p_value"]<= p_value_threshold)]
-
-selected_variables = selected_variables["input_variable"].tolist()
+selected_variables = select_features(summary_stats, p_value_threshold, score_threshold)
 
-X_new = X[selected_variables]
\ No newline at end of file
+X_new = X[selected_variables]
@@ -9,30 +9,40 @@ import pandas as pd
 
 my_df = pd.read_csv("feature_selection_sample_data.csv")
 
-from sklearn.feature_selection import RFECV
 from sklearn.linear_model import LinearRegression
 
-X = my_df.drop(["output"],axis =1)
+import sys
+sys.path.append("..")
 
-y = my_df["output"]
+from ml_toolkit.feature_elimination import FastRFECV
 
-regressor = LinearRegression()
-feature_selector = RFECV(regressor)
+# FastRFECV runs the cross validation folds in worker processes, which
+# re-import this script where they are spawned (Windows, macOS), so the
+# steps below only run when the script itself is run
 
-fit = feature_selector.fit(X,y)
+if __name__ == "__main__":
 
-optimal_feature_count = feature_selector.n_features_
-print(f"Optimal number of features : {optimal_feature_count}")
+    X = my_df.drop(["output"],axis =1)
 
-X_new = X.loc[:,feature_selector.get_support()]
+    y = my_df["output"]
 
+    regressor = LinearRegression()
+    feature_selector = FastRFECV(regressor, n_jobs = -1)
 
+    fit = feature_selector.fit(X,y)
 
-import matplotlib.pyplot as plt
+    optimal_feature_count = feature_selector.n_features_
+    print(f"Optimal number of features : {optimal_feature_count}")
 
-plt.plot(range(1, len(fit.cv_results_['mean_test_score']) + 1), fit.cv_results_['mean_test_score'], marker = "o")
-plt.ylabel("Model Score")
-plt.xlabel("Number of Features")
-plt.title(f"Feature Selection using RFE \n Optimal number of features is {optimal_feature_count} (at score of {round(max(fit.cv_results_['mean_test_score']),4)})")
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+    X_new = X.loc[:,feature_selector.get_support()]
+
+
+
+    import matplotlib.pyplot as plt
+
+    plt.plot(range(1, len(fit.cv_results_['mean_test_score']) + 1), fit.cv_results_['mean_test_score'], marker = "o")
+    plt.ylabel("Model Score")
+    plt.xlabel("Number of Features")
+    plt.title(f"Feature Selection using RFE \n Optimal number of features is {optimal_feature_count} (at score of {round(max(fit.cv_results_['mean_test_score']),4)})")
+    plt.tight_layout()
+    plt.show()
\ No newline at end of file
@@ -54,6 +54,28 @@ cv_scores = cross_val_score(regressor, X, y , cv=cv, scoring="r2")
 
 cv_scores.mean()
 
+# Linear regression folds without refitting: the same scores from one set of
+# cross-products, so many folds or repeats cost about one fit
+
+import sys
+sys.path.append("..")
+
+from ml_toolkit.linear_validation import LinearValidator
+from sklearn.model_selection import RepeatedKFold
+
+validator = LinearValidator(X, y)
+
+cv_scores = validator.cv_scores(cv)
+cv_scores.mean()
+
+cv_scores = validator.cv_scores(RepeatedKFold(n_splits=10, n_repeats=10, random_state=42))
+cv_scores.mean()
+
+# Exact leave-one-out error, from the hat matrix of the full fit
+
+validator.leave_one_out_mse()
+validator.leave_one_out_r2()
+
 #Classfication
 
 cv= StratifiedKFold(n_splits=4, random_state= 42,shuffle= True)
@@ -10,7 +10,12 @@
 
 import pandas as pd
 
-import pickle
+import sys
+sys.path.append("..")
+
+from ml_toolkit.grocery_data import load_sheet, sheet_path
+from ml_toolkit.incremental_aggregation import refresh_sales_summary
+from ml_toolkit.model_data import save_model_data
 
 
 
@@ -18,9 +23,10 @@ import pickle
 
 # Import the Data
 
-loyalty_scores = pd.read_excel("data/grocery_database.xlsx", sheet_name="loyalty_scores")
-customer_details = pd.read_excel("data/grocery_database.xlsx", sheet_name="customer_details")
-transactions = pd.read_excel("data/grocery_database.xlsx", sheet_name="transactions")
+# Sheets are read through a memory-mapped cache of the workbook (see ml_toolkit/grocery_data.py)
+
+loyalty_scores = load_sheet("loyalty_scores")
+customer_details = load_sheet("customer_details")
 
 
 
@@ -29,13 +35,12 @@ transactions = pd.read_excel("data/grocery_database.xlsx", sheet_name="transacti
 data_for_regression = pd.merge(customer_details, loyalty_scores, how="left", on="customer_id")
 
 
-sales_summary = transactions.groupby("customer_id").agg({"sales_cost": "sum",
-                                                         "num_items" : "sum",
-                                                         "transaction_id" :"count",
-                                                         "product_area_id" :"nunique"}).reset_index()
-
+# Transactions are aggregated in chunks so the full log never has to sit in memory
+# (same result as groupby("customer_id") with sum/sum/count/nunique)
+# Running aggregates are kept in data/cache/customer_aggregates, so only transactions
+# added since the last run are processed - pass full = True to rebuild from scratch
 
-sales_summary.columns =["customer_id","total_sales","total_items","transaction_count","product_area_count"]
+sales_summary = refresh_sales_summary(sheet_path("transactions"), chunk_size=1_000_000)
 
 sales_summary["average_basket_value"] = sales_summary["total_sales"] / sales_summary["transaction_count"]
 
@@ -51,5 +56,5 @@ regression_scoring.drop(["customer_loyalty_score"],axis =1 ,inplace=True)
 # Save the files
 
 
-pickle.dump(regression_modelling, open("data/abc_regression_modelling.p","wb"))
-pickle.dump(regression_scoring, open("data/regression_scoring.p","wb"))
\ No newline at end of file
+save_model_data(regression_modelling, "abc_regression_modelling")
+save_model_data(regression_scoring, "regression_scoring")
@@ -46,19 +46,18 @@ r2_score(y_test,y_pred)
 
 
 
+# Out-of-core Alternative
 
+# The same coefficients from X'X and X'y accumulated over chunks of the file,
+# so the data only has to fit on disk
 
+import sys
+sys.path.append("..")
 
+from ml_toolkit.streaming_regression import StreamingLinearRegression
 
+streaming_regressor = StreamingLinearRegression()
+streaming_regressor.fit_source("data/sample_data_regression.csv", target = "output", chunk_size = 100_000)
 
-
-
-
-
-
-
-
-
-
-
-
+streaming_regressor.coef_
+streaming_regressor.intercept_
@@ -8,187 +8,209 @@
 ##############################################################################
 
 import pandas as pd
-import pickle
 import matplotlib.pyplot as plt
 
 
 from sklearn.linear_model import LinearRegression
 from sklearn.utils import shuffle
-from sklearn.model_selection import train_test_split, cross_val_score, KFold
-from sklearn.metrics import r2_score
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.feature_selection import RFECV
+from sklearn.model_selection import train_test_split, KFold
 
+import sys
+sys.path.append("..")
 
-##############################################################################
-# Import Sample Data
-##############################################################################
+from ml_toolkit.model_data import load_model_data
+from ml_toolkit.encoding import FrameEncoder
+from ml_toolkit.outliers import remove_outliers
+from ml_toolkit.feature_elimination import FastRFECV
+from ml_toolkit.linear_validation import LinearValidator
+from ml_toolkit.metrics import RegressionMetrics
+from ml_toolkit.bootstrap import bootstrap_metrics
+from ml_toolkit.streaming_regression import StreamingLinearRegression
+from ml_toolkit.online_regression import OnlineLinearRegression
 
-# Import
 
-data_for_model = pickle.load(open("data/abc_regression_modelling.p","rb"))
+# FastRFECV runs the cross validation folds in worker processes, which
+# re-import this script where they are spawned (Windows, macOS), so the
+# steps below only run when the script itself is run
 
+if __name__ == "__main__":
 
-# Remove Unnecessary Columns
+    ##############################################################################
+    # Import Sample Data
+    ##############################################################################
 
-data_for_model.drop("customer_id",axis =1 , inplace =True)
+    # Import (customer_id is not needed for modelling, so it is never read)
 
-# Shuffle Data
+    data_for_model = load_model_data("abc_regression_modelling", exclude=["customer_id"])
 
-data_for_model = shuffle(data_for_model,random_state=42)
+    # Shuffle Data
 
+    data_for_model = shuffle(data_for_model,random_state=42)
 
-##############################################################################
-# Deal with Missing Values
-##############################################################################
 
-data_for_model.isna().sum()
+    ##############################################################################
+    # Deal with Missing Values
+    ##############################################################################
 
-data_for_model.dropna(how = "any", inplace = True)
+    data_for_model.isna().sum()
 
+    data_for_model.dropna(how = "any", inplace = True)
 
-##############################################################################
-# Deal with Outliers
-##############################################################################
 
+    ##############################################################################
+    # Deal with Outliers
+    ##############################################################################
 
-outlier_investigation = data_for_model.describe()
 
-# Box Plot Approach 
+    outlier_investigation = data_for_model.describe()
 
-outlier_columns =["distance_from_store","total_sales","total_items"]
+    # Box Plot Approach 
 
+    outlier_columns =["distance_from_store","total_sales","total_items"]
 
-for column in outlier_columns:
-    
-    lower_quartile =data_for_model[column].quantile(0.25)
-    upper_quartile =data_for_model[column].quantile(0.75)
-    iqr = upper_quartile - lower_quartile
-    extended_iqr = iqr * 2
-    min_border = lower_quartile - extended_iqr
-    max_border = upper_quartile + extended_iqr
-    
-    outliers = data_for_model[(data_for_model[column]< min_border) | (data_for_model[column]> max_border)].index
-    print(f"{len(outliers)} Outliers dectected in column {column}")
-    
-    data_for_model.drop(outliers,inplace=True)
 
+    # Column by column, each column's borders computed on the rows the previous
+    # columns kept, as the model data has always been filtered (the default,
+    # sequential = False, takes every border from the same data in one pass)
 
-##############################################################################
-# Split Input and Output Variables
-##############################################################################
+    data_for_model = remove_outliers(data_for_model, outlier_columns, method = "iqr", factor = 2, sequential = True)
 
-X = data_for_model.drop(["customer_loyalty_score"],axis = 1 )
 
-y = data_for_model["customer_loyalty_score"]
+    ##############################################################################
+    # Split Input and Output Variables
+    ##############################################################################
 
+    X = data_for_model.drop(["customer_loyalty_score"],axis = 1 )
 
-##############################################################################
-# Split out Traing and Test sets
-##############################################################################
+    y = data_for_model["customer_loyalty_score"]
 
 
-X_train,X_test,y_train,y_test = train_test_split(X, y,test_size=0.2,random_state=42)
+    ##############################################################################
+    # Split out Traing and Test sets
+    ##############################################################################
 
 
-##############################################################################
-# Deal with Categorical Values
-##############################################################################
+    X_train,X_test,y_train,y_test = train_test_split(X, y,test_size=0.2,random_state=42)
 
 
-categorical_vars = ["gender"]
+    ##############################################################################
+    # Deal with Categorical Values
+    ##############################################################################
 
-one_hot_encoder = OneHotEncoder(sparse_output=False,drop="first")
 
-X_train_encoded = one_hot_encoder.fit_transform(X_train[categorical_vars])
-X_test_encoded = one_hot_encoder.transform(X_test[categorical_vars])
+    categorical_vars = ["gender"]
 
-encoder_feature_names = one_hot_encoder.get_feature_names_out(categorical_vars)
+    # Numeric and encoded columns are written straight into one float matrix
 
+    one_hot_encoder = FrameEncoder(categorical_vars, drop = "first")
 
+    X_train = one_hot_encoder.fit_transform_frame(X_train)
+    X_test = one_hot_encoder.transform_frame(X_test)
 
-X_train_encoded = pd.DataFrame(X_train_encoded, columns=encoder_feature_names)
-X_train = pd.concat([X_train.reset_index(drop=True),X_train_encoded.reset_index(drop=True)], axis= 1)
-X_train.drop(categorical_vars, axis = 1 , inplace =True)
 
-X_test_encoded = pd.DataFrame(X_test_encoded, columns=encoder_feature_names)
-X_test = pd.concat([X_test.reset_index(drop=True),X_test_encoded.reset_index(drop=True)], axis= 1)
-X_test.drop(categorical_vars, axis = 1 , inplace =True)
+    ##############################################################################
+    # Feature Selection
+    ##############################################################################
 
 
-##############################################################################
-# Feature Selection
-##############################################################################
+    regressor = LinearRegression()
+    feature_selector = FastRFECV(regressor, n_jobs = -1)
+
+    fit = feature_selector.fit(X_train,y_train)
+
+    optimal_feature_count = feature_selector.n_features_
+    print(f"Optimal number of features : {optimal_feature_count}")
+
+    X_train = X_train.loc[:,feature_selector.get_support()]
+    X_test = X_test.loc[:,feature_selector.get_support()]
+
+
+    plt.plot(range(1, len(fit.cv_results_['mean_test_score']) + 1), fit.cv_results_['mean_test_score'], marker = "o")
+    plt.ylabel("Model Score")
+    plt.xlabel("Number of Features")
+    plt.title(f"Feature Selection using RFE \n Optimal number of features is {optimal_feature_count} (at score of {round(max(fit.cv_results_['mean_test_score']),4)})")
+    plt.tight_layout()
+    plt.show()
+
+
+    ################################################################################
+    # Model Training
+    ################################################################################
+
+    # Fitted from the accumulated X'X and X'y (the same coef_ and intercept_ as
+    # LinearRegression); partial_fit or fit_source train on data larger than memory
+
+    regressor = StreamingLinearRegression()
+    regressor.fit(X_train,y_train)
 
 
-regressor = LinearRegression()
-feature_selector = RFECV(regressor)
 
-fit = feature_selector.fit(X_train,y_train)
+    # Weekly Refresh
 
-optimal_feature_count = feature_selector.n_features_
-print(f"Optimal number of features : {optimal_feature_count}")
+    # The model state is kept on disk; each week the newly labelled customers are
+    # absorbed (and with window set, the oldest week removed) by rank-k updates of
+    # its Cholesky factor instead of retraining on the full history
 
-X_train = X_train.loc[:,feature_selector.get_support()]
-X_test = X_test.loc[:,feature_selector.get_support()]
+    online_regressor = OnlineLinearRegression(window = 52)
+    online_regressor.partial_fit(X_train, y_train)
+    online_regressor.save("data/cache/loyalty_regression.npz")
 
+    # Next week: online_regressor = OnlineLinearRegression.load("data/cache/loyalty_regression.npz")
+    # online_regressor.partial_fit(X_new_week, y_new_week)
+    # online_regressor.save("data/cache/loyalty_regression.npz")
 
-plt.plot(range(1, len(fit.cv_results_['mean_test_score']) + 1), fit.cv_results_['mean_test_score'], marker = "o")
-plt.ylabel("Model Score")
-plt.xlabel("Number of Features")
-plt.title(f"Feature Selection using RFE \n Optimal number of features is {optimal_feature_count} (at score of {round(max(fit.cv_results_['mean_test_score']),4)})")
-plt.tight_layout()
-plt.show()
 
 
-################################################################################
-# Model Training
-################################################################################
+    ################################################################################
+    # Model Assessment
+    ################################################################################
 
-regressor = LinearRegression()
-regressor.fit(X_train,y_train)
 
+    # Predict on Test Set
+    y_pred = regressor.predict(X_test)
 
 
-################################################################################
-# Model Assessment
-################################################################################
+    # Calculate R-Squared
 
+    metrics = RegressionMetrics().update(y_test, y_pred)
+    r_squared = metrics.r2()
+    print(r_squared)
 
-# Predict on Test Set
-y_pred = regressor.predict(X_test)
+    # Cross Validation
 
+    cv= KFold(n_splits=4, random_state= 42,shuffle= True)
+    validator = LinearValidator(X_train, y_train)
+    cv_scores = validator.cv_scores(cv)
+    cv_scores.mean()
 
-# Calculate R-Squared
+    # Leave-one-out error from the same fit
 
-r_squared = r2_score(y_test, y_pred)
-print(r_squared)
+    validator.leave_one_out_mse()
 
-# Cross Validation
 
-cv= KFold(n_splits=4, random_state= 42,shuffle= True)
-cv_scores = cross_val_score(regressor, X_train,y_train , cv=cv, scoring="r2")
-cv_scores.mean()
+    # Calculate Adjusted R-Squared
 
+    num_data_points, num_input_vars = X_test.shape
 
-# Calculate Adjusted R-Squared
+    adjusted_r_squared = metrics.adjusted_r2(num_input_vars)
 
-num_data_points, num_input_vars = X_test.shape
+    print(adjusted_r_squared)
 
-adjusted_r_squared = 1 - (1 - r_squared ) * (num_data_points - 1) / (num_data_points - num_input_vars - 1)
+    # Bootstrap Confidence Interval for R-Squared
 
-print(adjusted_r_squared)
+    r_squared_interval = bootstrap_metrics(y_test, y_pred, metrics = ["r2"], n_replicates = 1000, random_state = 42)
+    print(r_squared_interval)
 
-# Extract Model Coefficients
+    # Extract Model Coefficients
 
-coefficients = pd.DataFrame(regressor.coef_)
-input_variable_names = pd.DataFrame(X_train.columns)
-summary_stats = pd.concat([input_variable_names,coefficients], axis = 1)
-summary_stats.columns = ["input_variable","coefficient"]
+    coefficients = pd.DataFrame(regressor.coef_)
+    input_variable_names = pd.DataFrame(X_train.columns)
+    summary_stats = pd.concat([input_variable_names,coefficients], axis = 1)
+    summary_stats.columns = ["input_variable","coefficient"]
 
-# Extract Model Intercept
+    # Extract Model Intercept
 
-regressor.intercept_
+    regressor.intercept_
 
 
 
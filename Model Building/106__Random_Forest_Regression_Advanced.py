@@ -15,24 +15,25 @@ import matplotlib.pyplot as plt
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.utils import shuffle
 from sklearn.model_selection import train_test_split, cross_val_score, KFold
-from sklearn.metrics import r2_score
-from sklearn.preprocessing import OneHotEncoder
 from sklearn.inspection import permutation_importance
 
+import sys
+sys.path.append("..")
+
+from ml_toolkit.model_data import load_model_data
+from ml_toolkit.encoding import FrameEncoder
+from ml_toolkit.metrics import RegressionMetrics
+from ml_toolkit.bootstrap import bootstrap_metrics
+from ml_toolkit.compiled_trees import compile_model
 
 
 ##############################################################################
 # Import Sample Data
 ##############################################################################
 
-# Import
-
-data_for_model = pickle.load(open("data/abc_regression_modelling.p","rb"))
-
+# Import (customer_id is not needed for modelling, so it is never read)
 
-# Remove Unnecessary Columns
-
-data_for_model.drop("customer_id",axis =1 , inplace =True)
+data_for_model = load_model_data("abc_regression_modelling", exclude=["customer_id"])
 
 # Shuffle Data
 
@@ -73,22 +74,12 @@ X_train,X_test,y_train,y_test = train_test_split(X, y,test_size=0.2,random_state
 
 categorical_vars = ["gender"]
 
-one_hot_encoder = OneHotEncoder(sparse_output=False,drop="first")
-
-X_train_encoded = one_hot_encoder.fit_transform(X_train[categorical_vars])
-X_test_encoded = one_hot_encoder.transform(X_test[categorical_vars])
+# Numeric and encoded columns are written straight into one float matrix
 
-encoder_feature_names = one_hot_encoder.get_feature_names_out(categorical_vars)
+one_hot_encoder = FrameEncoder(categorical_vars, drop = "first")
 
-
-
-X_train_encoded = pd.DataFrame(X_train_encoded, columns=encoder_feature_names)
-X_train = pd.concat([X_train.reset_index(drop=True),X_train_encoded.reset_index(drop=True)], axis= 1)
-X_train.drop(categorical_vars, axis = 1 , inplace =True)
-
-X_test_encoded = pd.DataFrame(X_test_encoded, columns=encoder_feature_names)
-X_test = pd.concat([X_test.reset_index(drop=True),X_test_encoded.reset_index(drop=True)], axis= 1)
-X_test.drop(categorical_vars, axis = 1 , inplace =True)
+X_train = one_hot_encoder.fit_transform_frame(X_train)
+X_test = one_hot_encoder.transform_frame(X_test)
 
 
 
@@ -112,7 +103,8 @@ y_pred = regressor.predict(X_test)
 
 # Calculate R-Squared
 
-r_squared = r2_score(y_test, y_pred)
+metrics = RegressionMetrics().update(y_test, y_pred)
+r_squared = metrics.r2()
 print(r_squared)
 
 # Cross Validation
@@ -126,10 +118,15 @@ cv_scores.mean()
 
 num_data_points, num_input_vars = X_test.shape
 
-adjusted_r_squared = 1 - (1 - r_squared ) * (num_data_points - 1) / (num_data_points - num_input_vars - 1)
+adjusted_r_squared = metrics.adjusted_r2(num_input_vars)
 
 print(adjusted_r_squared)
 
+# Bootstrap Confidence Interval for R-Squared
+
+r_squared_interval = bootstrap_metrics(y_test, y_pred, metrics = ["r2"], n_replicates = 1000, random_state = 42)
+print(r_squared_interval)
+
 
 # Feature Importance
 
@@ -170,23 +167,37 @@ plt.show()
 
 # Predictions under the hood
 
+# (the compiled forest gives every tree's prediction for every row in one pass)
+
+compiled_regressor = compile_model(regressor)
+
 y_pred[0]
 new_data = [X_test.iloc[0]]
 regressor.estimators_
 
-predictions = []
-tree_count = 0
-for tree in regressor.estimators_:
-    prediction = tree.predict(new_data)[0]
-    predictions.append(prediction)
-    tree_count += 1
-    
+predictions = compiled_regressor.predict_trees(new_data)[0]
+tree_count = compiled_regressor.n_trees
+
 print(predictions)
 
 
 sum(predictions) / tree_count
 
 
+# Spread of the tree predictions for every test customer - the mean is the
+# forest's prediction, lower and upper hold the middle 90% of the trees
+
+prediction_summary = compiled_regressor.predict_summary(X_test, quantiles = [0.5], confidence = 0.9)
+print(prediction_summary.head())
+
+
 pickle.dump(regressor,open("data/random_forest_regression_model.p","wb"))
 pickle.dump(one_hot_encoder,open("data/random_forest_regression_ohe.p","wb"))
 
+# The forest as flat node arrays for 107, which scores with them when numba is
+# installed (compact stores narrow dtypes and each distinct leaf value once,
+# with the same predictions - benchmarks/forest_artifact.py compares its size
+# and 107's cold start with the pickle's)
+
+compiled_regressor.compact().save("data/cache/random_forest_regression_compiled")
+
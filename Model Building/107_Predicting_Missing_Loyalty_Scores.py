@@ -4,20 +4,36 @@
 import pandas as pd
 import pickle
 
+import sys
+sys.path.append("..")
+
+from ml_toolkit.model_data import load_model_data
+from ml_toolkit.compiled_trees import HAS_NUMBA, compile_model, is_up_to_date, load_compiled
+
 # Import customers for scoring
 
-to_be_scored = pickle.load(open("data/regression_scoring.p","rb"))
+to_be_scored = load_model_data("regression_scoring", exclude=["customer_id"])
 
 
 # Import model and model objects 
 
-regressor = pickle.load(open("data/random_forest_regression_model.p","rb"))
+# (with numba installed, the compiled forest saved by 106 gives the same
+# predictions as the pickled RandomForestRegressor and is faster to load and
+# to score - see benchmarks/compiled_forest.py and forest_artifact.py - and it
+# is recompiled from the pickle whenever the pickle is newer; without numba
+# the pickled forest is the faster one)
+
+model_path = "data/random_forest_regression_model.p"
+compiled_path = "data/cache/random_forest_regression_compiled"
+
+if HAS_NUMBA:
+    if not is_up_to_date(compiled_path, model_path):
+        compile_model(pickle.load(open(model_path,"rb"))).compact().save(compiled_path)
+    regressor = load_compiled(compiled_path)
+else:
+    regressor = pickle.load(open(model_path,"rb"))
 one_hot_encoder = pickle.load(open("data/random_forest_regression_ohe.p","rb"))
 
-# Drop unused columns
-
-to_be_scored.drop("customer_id", axis =1 , inplace =True)
-
 # Drop missing values
 
 
@@ -25,12 +41,9 @@ to_be_scored.dropna(how ="any", inplace = True)
 
 # Apply one hot encoding 
 
-categorical_vars = ["gender"]
-encoder_vars_array = one_hot_encoder.transform(to_be_scored[categorical_vars])
-encoder_feature_names = one_hot_encoder.get_feature_names_out(categorical_vars)
-encoder_vars_df = pd.DataFrame(encoder_vars_array, columns=encoder_feature_names)
-to_be_scored = pd.concat([to_be_scored.reset_index(drop=True),encoder_vars_df.reset_index(drop=True)], axis= 1)
-to_be_scored.drop(categorical_vars, axis = 1 , inplace =True)
+# (the FrameEncoder saved by 106 writes numeric and encoded columns into one matrix)
+
+to_be_scored = one_hot_encoder.transform_frame(to_be_scored)
 
 # Make our Predictions !
 
@@ -9,11 +9,15 @@
 
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score , confusion_matrix
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+import sys
+sys.path.append("..")
+
+from ml_toolkit.metrics import ClassificationMetrics
+
 # Import Sample Data
 
 my_df = pd.read_csv("data/sample_data_classification.csv")
@@ -44,7 +48,11 @@ clf.fit(X_train, y_train)
 
 y_pred = clf.predict(X_test)
 
-accuracy_score(y_test,y_pred)
+# One pass over the labels for the confusion matrix and every metric
+
+metrics = ClassificationMetrics().update(y_test, y_pred)
+
+metrics.accuracy()
 
 
 
@@ -54,7 +62,7 @@ y_pred_prob = clf.predict_proba(X_test)
 
 # Confusion Matrix
 
-conf_matrix = confusion_matrix(y_test,y_pred)
+conf_matrix = metrics.confusion_matrix_
 
 print(conf_matrix)
 
@@ -7,239 +7,225 @@
 # Import Required Packages
 ##############################################################################
 
-import pandas as pd
 import pickle
 import matplotlib.pyplot as plt
 import numpy as np
 from sklearn.linear_model import LogisticRegression
 from sklearn.utils import shuffle
 from sklearn.model_selection import train_test_split, cross_val_score, KFold
-from sklearn.metrics import confusion_matrix, accuracy_score, precision_score, recall_score,f1_score
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.feature_selection import RFECV
 
+import sys
+sys.path.append("..")
 
-##############################################################################
-# Import Sample Data
-##############################################################################
+from ml_toolkit.model_data import load_model_data
+from ml_toolkit.encoding import FrameEncoder
+from ml_toolkit.outliers import remove_outliers
+from ml_toolkit.feature_elimination import FastRFECV
+from ml_toolkit.thresholds import threshold_sweep, best_threshold
+from ml_toolkit.metrics import ClassificationMetrics
+from ml_toolkit.bootstrap import bootstrap_metrics
 
-# Import
 
-data_for_model = pd.read_pickle(("data/abc_classification_modelling.p"))
+# FastRFECV runs the cross validation folds in worker processes, which
+# re-import this script where they are spawned (Windows, macOS), so the
+# steps below only run when the script itself is run
 
+if __name__ == "__main__":
 
-# Remove Unnecessary Columns
+    ##############################################################################
+    # Import Sample Data
+    ##############################################################################
 
-data_for_model.drop("customer_id",axis =1 , inplace =True)
+    # Import (customer_id is not needed for modelling, so it is never read)
 
-# Shuffle Data
+    data_for_model = load_model_data("abc_classification_modelling", exclude=["customer_id"])
 
-data_for_model = shuffle(data_for_model,random_state=42)
+    # Shuffle Data
 
-data_for_model["signup_flag"].value_counts(normalize = True)
+    data_for_model = shuffle(data_for_model,random_state=42)
 
-##############################################################################
-# Deal with Missing Values
-##############################################################################
+    data_for_model["signup_flag"].value_counts(normalize = True)
 
-data_for_model.isna().sum()
+    ##############################################################################
+    # Deal with Missing Values
+    ##############################################################################
 
-data_for_model.dropna(how = "any", inplace = True)
+    data_for_model.isna().sum()
 
+    data_for_model.dropna(how = "any", inplace = True)
 
-##############################################################################
-# Deal with Outliers
-##############################################################################
 
+    ##############################################################################
+    # Deal with Outliers
+    ##############################################################################
 
-outlier_investigation = data_for_model.describe()
 
-# Box Plot Approach 
+    outlier_investigation = data_for_model.describe()
 
-outlier_columns =["distance_from_store","total_sales","total_items"]
+    # Box Plot Approach 
 
+    outlier_columns =["distance_from_store","total_sales","total_items"]
 
-for column in outlier_columns:
-    
-    lower_quartile =data_for_model[column].quantile(0.25)
-    upper_quartile =data_for_model[column].quantile(0.75)
-    iqr = upper_quartile - lower_quartile
-    extended_iqr = iqr * 2
-    min_border = lower_quartile - extended_iqr
-    max_border = upper_quartile + extended_iqr
-    
-    outliers = data_for_model[(data_for_model[column]< min_border) | (data_for_model[column]> max_border)].index
-    print(f"{len(outliers)} Outliers dectected in column {column}")
-    
-    data_for_model.drop(outliers,inplace=True)
 
+    # Column by column, each column's borders computed on the rows the previous
+    # columns kept, as the model data has always been filtered (the default,
+    # sequential = False, takes every border from the same data in one pass)
 
-##############################################################################
-# Split Input and Output Variables
-##############################################################################
+    data_for_model = remove_outliers(data_for_model, outlier_columns, method = "iqr", factor = 2, sequential = True)
 
-X = data_for_model.drop(["signup_flag"],axis = 1 )
 
-y = data_for_model["signup_flag"]
+    ##############################################################################
+    # Split Input and Output Variables
+    ##############################################################################
 
+    X = data_for_model.drop(["signup_flag"],axis = 1 )
 
-##############################################################################
-# Split out Traing and Test sets
-##############################################################################
+    y = data_for_model["signup_flag"]
 
 
-X_train,X_test,y_train,y_test = train_test_split(X, y,test_size=0.2,random_state=42, stratify=y)
+    ##############################################################################
+    # Split out Traing and Test sets
+    ##############################################################################
 
 
-##############################################################################
-# Deal with Categorical Values
-##############################################################################
+    X_train,X_test,y_train,y_test = train_test_split(X, y,test_size=0.2,random_state=42, stratify=y)
 
 
-categorical_vars = ["gender"]
+    ##############################################################################
+    # Deal with Categorical Values
+    ##############################################################################
 
-one_hot_encoder = OneHotEncoder(sparse_output=False,drop="first")
 
-X_train_encoded = one_hot_encoder.fit_transform(X_train[categorical_vars])
-X_test_encoded = one_hot_encoder.transform(X_test[categorical_vars])
+    categorical_vars = ["gender"]
 
-encoder_feature_names = one_hot_encoder.get_feature_names_out(categorical_vars)
+    # Numeric and encoded columns are written straight into one float matrix
 
+    one_hot_encoder = FrameEncoder(categorical_vars, drop = "first")
 
+    X_train = one_hot_encoder.fit_transform_frame(X_train)
+    X_test = one_hot_encoder.transform_frame(X_test)
 
-X_train_encoded = pd.DataFrame(X_train_encoded, columns=encoder_feature_names)
-X_train = pd.concat([X_train.reset_index(drop=True),X_train_encoded.reset_index(drop=True)], axis= 1)
-X_train.drop(categorical_vars, axis = 1 , inplace =True)
 
-X_test_encoded = pd.DataFrame(X_test_encoded, columns=encoder_feature_names)
-X_test = pd.concat([X_test.reset_index(drop=True),X_test_encoded.reset_index(drop=True)], axis= 1)
-X_test.drop(categorical_vars, axis = 1 , inplace =True)
+    ##############################################################################
+    # Feature Selection
+    ##############################################################################
 
 
-##############################################################################
-# Feature Selection
-##############################################################################
+    clf = LogisticRegression(random_state= 42, max_iter= 1000)
+    feature_selector = FastRFECV(clf, n_jobs = -1)
+
+    fit = feature_selector.fit(X_train,y_train)
 
+    optimal_feature_count = feature_selector.n_features_
+    print(f"Optimal number of features : {optimal_feature_count}")
 
-clf = LogisticRegression(random_state= 42, max_iter= 1000)
-feature_selector = RFECV(clf)
+    X_train = X_train.loc[:,feature_selector.get_support()]
+    X_test = X_test.loc[:,feature_selector.get_support()]
 
-fit = feature_selector.fit(X_train,y_train)
 
-optimal_feature_count = feature_selector.n_features_
-print(f"Optimal number of features : {optimal_feature_count}")
+    plt.plot(range(1, len(fit.cv_results_['mean_test_score']) + 1), fit.cv_results_['mean_test_score'], marker = "o")
+    plt.ylabel("Model Score")
+    plt.xlabel("Number of Features")
+    plt.title(f"Feature Selection using RFE \n Optimal number of features is {optimal_feature_count} (at score of {round(max(fit.cv_results_['mean_test_score']),4)})")
+    plt.tight_layout()
+    plt.show()
 
-X_train = X_train.loc[:,feature_selector.get_support()]
-X_test = X_test.loc[:,feature_selector.get_support()]
 
+    ################################################################################
+    # Model Training
+    ################################################################################
 
-plt.plot(range(1, len(fit.cv_results_['mean_test_score']) + 1), fit.cv_results_['mean_test_score'], marker = "o")
-plt.ylabel("Model Score")
-plt.xlabel("Number of Features")
-plt.title(f"Feature Selection using RFE \n Optimal number of features is {optimal_feature_count} (at score of {round(max(fit.cv_results_['mean_test_score']),4)})")
-plt.tight_layout()
-plt.show()
+    clf = LogisticRegression(random_state= 42, max_iter= 1000)
+    clf.fit(X_train,y_train)
 
 
-################################################################################
-# Model Training
-################################################################################
 
-clf = LogisticRegression(random_state= 42, max_iter= 1000)
-clf.fit(X_train,y_train)
+    ################################################################################
+    # Model Assessment
+    ################################################################################
 
 
+    # Access Model Accuracy
 
-################################################################################
-# Model Assessment
-################################################################################
+    y_pred_class = clf.predict(X_test)
 
+    y_pred_prob = clf.predict_proba(X_test)[:,1]
 
-# Access Model Accuracy
 
-y_pred_class = clf.predict(X_test)
+    # Confusion Matrix
 
-y_pred_prob = clf.predict_proba(X_test)[:,1]
+    metrics = ClassificationMetrics().update(y_test, y_pred_class)
+    conf_matrix = metrics.confusion_matrix_
 
+    #plt.style.available
 
-# Confusion Matrix
+    plt.style.use("seaborn-v0_8-poster")
+    plt.matshow(conf_matrix, cmap ="coolwarm")
+    plt.gca().xaxis.tick_bottom()
+    plt.title("Confusion Matrix")
+    plt.ylabel("Actual Class")
+    plt.xlabel("Predicted Class")
+    for (i, j), corr_value in np.ndenumerate(conf_matrix):
+        plt.text(j, i, corr_value, ha = "center",va ="center", fontsize =20)
+    plt.show()
 
-conf_matrix = confusion_matrix(y_test,y_pred_class)
 
-#plt.style.available
 
-plt.style.use("seaborn-v0_8-poster")
-plt.matshow(conf_matrix, cmap ="coolwarm")
-plt.gca().xaxis.tick_bottom()
-plt.title("Confusion Matrix")
-plt.ylabel("Actual Class")
-plt.xlabel("Predicted Class")
-for (i, j), corr_value in np.ndenumerate(conf_matrix):
-    plt.text(j, i, corr_value, ha = "center",va ="center", fontsize =20)
-plt.show()
+    # Accuracy (the number of correct classifications out of all attempted classifications)
 
+    metrics.accuracy()
 
 
-# Accuracy (the number of correct classifications out of all attempted classifications)
+    # Precision Score ( of all the observations that were predicted as positive, how many were actually positive)
 
-accuracy_score(y_test, y_pred_class)
+    metrics.precision()
 
+    # Recall Score ( of all the positive observations, how many did we predict  positive)
 
-# Precision Score ( of all the observations that were predicted as positive, how many were actually positive)
+    metrics.recall()
 
-precision_score(y_test, y_pred_class)
+    # F1 Score (Harmonic Mean of Precision and Recall Score)
 
-# Recall Score ( of all the positive observations, how many did we predict  positive)
+    metrics.f1()
 
-recall_score(y_test, y_pred_class)
+    # Bootstrap Confidence Intervals (all 1000 resamples scored at once)
 
-# F1 Score (Harmonic Mean of Precision and Recall Score)
+    metric_intervals = bootstrap_metrics(y_test, y_pred_class, metrics = ["accuracy", "precision", "recall", "f1"],
+                                         n_replicates = 1000, random_state = 42)
+    print(metric_intervals)
 
-f1_score(y_test, y_pred_class)
 
+    ################################################################################
+    # Finding the optimal Threshold
+    ################################################################################
 
-################################################################################
-# Finding the optimal Threshold
-################################################################################
 
+    thresholds = np.arange(0,1,0.01)
 
-thresholds = np.arange(0,1,0.01)
+    # Every threshold from one sort of the predicted probabilities
 
+    sweep = threshold_sweep(y_test, y_pred_prob, thresholds = thresholds)
 
-precision_scores =[]
-recall_scores =[]
-f1_scores =[]
+    precision_scores = sweep["precision"]
+    recall_scores = sweep["recall"]
+    f1_scores = sweep["f1"]
 
-for threshold in thresholds:
-    
-    pred_class = (y_pred_prob >= threshold) * 1
-    
-    precision = precision_score(y_test, pred_class ,zero_division= 0)
-    precision_scores.append(precision)
-    
-    recall = recall_score(y_test, pred_class)
-    recall_scores.append(recall)
-       
-    f1 = f1_score(y_test, pred_class)
-    f1_scores.append(f1)
-    
-    
-max_f1 = max(f1_scores)
-max_f1_idx = f1_scores.index(max_f1)
+    max_f1 = max(f1_scores)
+    max_f1_idx = np.argmax(f1_scores)
 
 
-plt.style.use("seaborn-v0_8-poster")
-plt.plot(thresholds,precision_scores,label ="Precision",linestyle ="--")
-plt.plot(thresholds,recall_scores,label ="Recall",linestyle ="--")
-plt.plot(thresholds,f1_scores,label ="F1",linewidth = 5)
-plt.title(f"Finding the Optimal threshold for Classification Model \n Max F1: {round(max_f1,2)}(Threshold = {round(thresholds[max_f1_idx],2)})")
-plt.xlabel("Threshold")
-plt.ylabel("Assessment Score")
-plt.legend(loc ="lower left")
-plt.tight_layout()
-plt.show()
+    plt.style.use("seaborn-v0_8-poster")
+    plt.plot(thresholds,precision_scores,label ="Precision",linestyle ="--")
+    plt.plot(thresholds,recall_scores,label ="Recall",linestyle ="--")
+    plt.plot(thresholds,f1_scores,label ="F1",linewidth = 5)
+    plt.title(f"Finding the Optimal threshold for Classification Model \n Max F1: {round(max_f1,2)}(Threshold = {round(thresholds[max_f1_idx],2)})")
+    plt.xlabel("Threshold")
+    plt.ylabel("Assessment Score")
+    plt.legend(loc ="lower left")
+    plt.tight_layout()
+    plt.show()
 
 
-optimal_threshold = 0.44
+    optimal_threshold = best_threshold(sweep, metric = "f1")
 
-y_pred_class_opt_thresh = (y_pred_prob >= optimal_threshold) * 1
+    y_pred_class_opt_thresh = (y_pred_prob >= optimal_threshold) * 1
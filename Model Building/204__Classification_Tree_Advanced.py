@@ -7,30 +7,30 @@
 # Import Required Packages
 ##############################################################################
 
-import pandas as pd
 import pickle
 import matplotlib.pyplot as plt
 import numpy as np
 from sklearn.tree import DecisionTreeClassifier , plot_tree
 from sklearn.utils import shuffle
 from sklearn.model_selection import train_test_split, cross_val_score, KFold
-from sklearn.metrics import confusion_matrix, accuracy_score, precision_score, recall_score,f1_score
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.metrics import f1_score
 
+import sys
+sys.path.append("..")
+
+from ml_toolkit.model_data import load_model_data
+from ml_toolkit.encoding import FrameEncoder
+from ml_toolkit.metrics import ClassificationMetrics
+from ml_toolkit.hist_tree import FeatureBinner, HistogramTreeClassifier
 
 
 ##############################################################################
 # Import Sample Data
 ##############################################################################
 
-# Import
-
-data_for_model = pd.read_pickle(("data/abc_classification_modelling.p"))
-
+# Import (customer_id is not needed for modelling, so it is never read)
 
-# Remove Unnecessary Columns
-
-data_for_model.drop("customer_id",axis =1 , inplace =True)
+data_for_model = load_model_data("abc_classification_modelling", exclude=["customer_id"])
 
 # Shuffle Data
 
@@ -73,22 +73,12 @@ X_train,X_test,y_train,y_test = train_test_split(X, y,test_size=0.2,random_state
 
 categorical_vars = ["gender"]
 
-one_hot_encoder = OneHotEncoder(sparse_output=False,drop="first")
-
-X_train_encoded = one_hot_encoder.fit_transform(X_train[categorical_vars])
-X_test_encoded = one_hot_encoder.transform(X_test[categorical_vars])
+# Numeric and encoded columns are written straight into one float matrix
 
-encoder_feature_names = one_hot_encoder.get_feature_names_out(categorical_vars)
+one_hot_encoder = FrameEncoder(categorical_vars, drop = "first")
 
-
-
-X_train_encoded = pd.DataFrame(X_train_encoded, columns=encoder_feature_names)
-X_train = pd.concat([X_train.reset_index(drop=True),X_train_encoded.reset_index(drop=True)], axis= 1)
-X_train.drop(categorical_vars, axis = 1 , inplace =True)
-
-X_test_encoded = pd.DataFrame(X_test_encoded, columns=encoder_feature_names)
-X_test = pd.concat([X_test.reset_index(drop=True),X_test_encoded.reset_index(drop=True)], axis= 1)
-X_test.drop(categorical_vars, axis = 1 , inplace =True)
+X_train = one_hot_encoder.fit_transform_frame(X_train)
+X_test = one_hot_encoder.transform_frame(X_test)
 
 
 
@@ -115,7 +105,8 @@ y_pred_prob = clf.predict_proba(X_test)[:,1]
 
 # Confusion Matrix
 
-conf_matrix = confusion_matrix(y_test,y_pred_class)
+metrics = ClassificationMetrics().update(y_test, y_pred_class)
+conf_matrix = metrics.confusion_matrix_
 
 #plt.style.available
 
@@ -133,20 +124,20 @@ plt.show()
 
 # Accuracy (the number of correct classifications out of all attempted classifications)
 
-accuracy_score(y_test, y_pred_class)
+metrics.accuracy()
 
 
 # Precision Score ( of all the observations that were predicted as positive, how many were actually positive)
 
-precision_score(y_test, y_pred_class)
+metrics.precision()
 
 # Recall Score ( of all the positive observations, how many did we predict  positive)
 
-recall_score(y_test, y_pred_class)
+metrics.recall()
 
 # F1 Score (Harmonic Mean of Precision and Recall Score)
 
-f1_score(y_test, y_pred_class)
+metrics.f1()
 
 
 # Finding the best max depth
@@ -178,6 +169,29 @@ plt.ylabel("Accuracy (F1 Score)")
 plt.tight_layout()
 plt.show()
 
+# Histogram-binned Alternative (for large data: features are cut into at most
+# 256 bins once, and the bins are reused by every tree and depth)
+
+binner = FeatureBinner().fit(X_train)
+histogram_tree = HistogramTreeClassifier(max_depth = max(max_depth_list), binner = binner)
+histogram_tree.fit(X_train, y_train)
+histogram_scores = histogram_tree.score_at_depths(X_test, y_test, max_depth_list, metric = f1_score)
+
+# (one histogram tree cut at every depth is the tree grown with that max depth)
+
+max_histogram_accuracy = max(histogram_scores)
+optimal_histogram_depth = max_depth_list[histogram_scores.index(max_histogram_accuracy)]
+print(f"Histogram-binned tree - optimal depth: {optimal_histogram_depth} (Accuracy: {round(max_histogram_accuracy,4)})")
+
+plt.plot(max_depth_list, accuracy_scores, label = "Exact splits")
+plt.plot(max_depth_list, histogram_scores, label = "Histogram-binned")
+plt.title("Accuracy (F1 Score) by Max Depth - Exact vs Histogram-binned Splits")
+plt.xlabel("Max Depth of Decision Tree")
+plt.ylabel("Accuracy (F1 Score)")
+plt.legend()
+plt.tight_layout()
+plt.show()
+
 # Plot our Model 
 
 plt.figure(figsize=(25,15))
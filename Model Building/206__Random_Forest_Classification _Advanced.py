@@ -14,24 +14,24 @@ import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.utils import shuffle
 from sklearn.model_selection import train_test_split, cross_val_score, KFold
-from sklearn.metrics import confusion_matrix, accuracy_score, precision_score, recall_score,f1_score
-from sklearn.preprocessing import OneHotEncoder
 from sklearn.inspection import permutation_importance
 
+import sys
+sys.path.append("..")
+
+from ml_toolkit.model_data import load_model_data
+from ml_toolkit.encoding import FrameEncoder
+from ml_toolkit.metrics import ClassificationMetrics
+from ml_toolkit.bootstrap import bootstrap_metrics
 
 
 ##############################################################################
 # Import Sample Data
 ##############################################################################
 
-# Import
-
-data_for_model = pd.read_pickle(("data/abc_classification_modelling.p"))
-
+# Import (customer_id is not needed for modelling, so it is never read)
 
-# Remove Unnecessary Columns
-
-data_for_model.drop("customer_id",axis =1 , inplace =True)
+data_for_model = load_model_data("abc_classification_modelling", exclude=["customer_id"])
 
 # Shuffle Data
 
@@ -74,22 +74,12 @@ X_train,X_test,y_train,y_test = train_test_split(X, y,test_size=0.2,random_state
 
 categorical_vars = ["gender"]
 
-one_hot_encoder = OneHotEncoder(sparse_output=False,drop="first")
-
-X_train_encoded = one_hot_encoder.fit_transform(X_train[categorical_vars])
-X_test_encoded = one_hot_encoder.transform(X_test[categorical_vars])
+# Numeric and encoded columns are written straight into one float matrix
 
-encoder_feature_names = one_hot_encoder.get_feature_names_out(categorical_vars)
+one_hot_encoder = FrameEncoder(categorical_vars, drop = "first")
 
-
-
-X_train_encoded = pd.DataFrame(X_train_encoded, columns=encoder_feature_names)
-X_train = pd.concat([X_train.reset_index(drop=True),X_train_encoded.reset_index(drop=True)], axis= 1)
-X_train.drop(categorical_vars, axis = 1 , inplace =True)
-
-X_test_encoded = pd.DataFrame(X_test_encoded, columns=encoder_feature_names)
-X_test = pd.concat([X_test.reset_index(drop=True),X_test_encoded.reset_index(drop=True)], axis= 1)
-X_test.drop(categorical_vars, axis = 1 , inplace =True)
+X_train = one_hot_encoder.fit_transform_frame(X_train)
+X_test = one_hot_encoder.transform_frame(X_test)
 
 
 
@@ -116,7 +106,8 @@ y_pred_prob = clf.predict_proba(X_test)[:,1]
 
 # Confusion Matrix
 
-conf_matrix = confusion_matrix(y_test,y_pred_class)
+metrics = ClassificationMetrics().update(y_test, y_pred_class)
+conf_matrix = metrics.confusion_matrix_
 
 #plt.style.available
 
@@ -134,20 +125,26 @@ plt.show()
 
 # Accuracy (the number of correct classifications out of all attempted classifications)
 
-accuracy_score(y_test, y_pred_class)
+metrics.accuracy()
 
 
 # Precision Score ( of all the observations that were predicted as positive, how many were actually positive)
 
-precision_score(y_test, y_pred_class)
+metrics.precision()
 
 # Recall Score ( of all the positive observations, how many did we predict  positive)
 
-recall_score(y_test, y_pred_class)
+metrics.recall()
 
 # F1 Score (Harmonic Mean of Precision and Recall Score)
 
-f1_score(y_test, y_pred_class)
+metrics.f1()
+
+# Bootstrap Confidence Intervals (all 1000 resamples scored at once)
+
+metric_intervals = bootstrap_metrics(y_test, y_pred_class, metrics = ["accuracy", "precision", "recall", "f1"],
+                                     n_replicates = 1000, random_state = 42)
+print(metric_intervals)
 
 
 
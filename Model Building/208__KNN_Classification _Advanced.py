@@ -14,227 +14,221 @@ import numpy as np
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.utils import shuffle
 from sklearn.model_selection import train_test_split, cross_val_score, KFold
-from sklearn.metrics import confusion_matrix, accuracy_score, precision_score, recall_score,f1_score
-from sklearn.preprocessing import OneHotEncoder,MinMaxScaler
-from sklearn.feature_selection import RFECV
+from sklearn.metrics import f1_score
 
+import sys
+sys.path.append("..")
 
-##############################################################################
-# Import Sample Data
-##############################################################################
+from ml_toolkit.model_data import load_model_data
+from ml_toolkit.encoding import FrameEncoder
+from ml_toolkit.scaling import StreamingScaler
+from ml_toolkit.outliers import remove_outliers
+from ml_toolkit.feature_elimination import FastRFECV
+from ml_toolkit.metrics import ClassificationMetrics
 
-# Import
 
-data_for_model = pd.read_pickle(("data/abc_classification_modelling.p"))
+# FastRFECV runs the cross validation folds in worker processes, which
+# re-import this script where they are spawned (Windows, macOS), so the
+# steps below only run when the script itself is run
 
+if __name__ == "__main__":
 
-# Remove Unnecessary Columns
+    ##############################################################################
+    # Import Sample Data
+    ##############################################################################
 
-data_for_model.drop("customer_id",axis =1 , inplace =True)
+    # Import (customer_id is not needed for modelling, so it is never read)
 
-# Shuffle Data
+    data_for_model = load_model_data("abc_classification_modelling", exclude=["customer_id"])
 
-data_for_model = shuffle(data_for_model,random_state=42)
+    # Shuffle Data
 
-data_for_model["signup_flag"].value_counts(normalize = True)
+    data_for_model = shuffle(data_for_model,random_state=42)
 
-##############################################################################
-# Deal with Missing Values
-##############################################################################
+    data_for_model["signup_flag"].value_counts(normalize = True)
 
-data_for_model.isna().sum()
+    ##############################################################################
+    # Deal with Missing Values
+    ##############################################################################
 
-data_for_model.dropna(how = "any", inplace = True)
+    data_for_model.isna().sum()
 
+    data_for_model.dropna(how = "any", inplace = True)
 
-##############################################################################
-# Deal with Outliers
-##############################################################################
 
+    ##############################################################################
+    # Deal with Outliers
+    ##############################################################################
 
-outlier_investigation = data_for_model.describe()
 
-# Box Plot Approach 
+    outlier_investigation = data_for_model.describe()
 
-outlier_columns =["distance_from_store","total_sales","total_items"]
+    # Box Plot Approach 
 
+    outlier_columns =["distance_from_store","total_sales","total_items"]
 
-for column in outlier_columns:
-    
-    lower_quartile =data_for_model[column].quantile(0.25)
-    upper_quartile =data_for_model[column].quantile(0.75)
-    iqr = upper_quartile - lower_quartile
-    extended_iqr = iqr * 2
-    min_border = lower_quartile - extended_iqr
-    max_border = upper_quartile + extended_iqr
-    
-    outliers = data_for_model[(data_for_model[column]< min_border) | (data_for_model[column]> max_border)].index
-    print(f"{len(outliers)} Outliers dectected in column {column}")
-    
-    data_for_model.drop(outliers,inplace=True)
 
+    # Column by column, each column's borders computed on the rows the previous
+    # columns kept, as the model data has always been filtered (the default,
+    # sequential = False, takes every border from the same data in one pass)
 
-##############################################################################
-# Split Input and Output Variables
-##############################################################################
+    data_for_model = remove_outliers(data_for_model, outlier_columns, method = "iqr", factor = 2, sequential = True)
 
-X = data_for_model.drop(["signup_flag"],axis = 1 )
 
-y = data_for_model["signup_flag"]
+    ##############################################################################
+    # Split Input and Output Variables
+    ##############################################################################
 
+    X = data_for_model.drop(["signup_flag"],axis = 1 )
 
-##############################################################################
-# Split out Traing and Test sets
-##############################################################################
-
+    y = data_for_model["signup_flag"]
 
-X_train,X_test,y_train,y_test = train_test_split(X, y,test_size=0.2,random_state=42, stratify=y)
 
-
-##############################################################################
-# Deal with Categorical Values
-##############################################################################
+    ##############################################################################
+    # Split out Traing and Test sets
+    ##############################################################################
 
 
-categorical_vars = ["gender"]
+    X_train,X_test,y_train,y_test = train_test_split(X, y,test_size=0.2,random_state=42, stratify=y)
 
-one_hot_encoder = OneHotEncoder(sparse_output=False,drop="first")
 
-X_train_encoded = one_hot_encoder.fit_transform(X_train[categorical_vars])
-X_test_encoded = one_hot_encoder.transform(X_test[categorical_vars])
+    ##############################################################################
+    # Deal with Categorical Values
+    ##############################################################################
 
-encoder_feature_names = one_hot_encoder.get_feature_names_out(categorical_vars)
 
+    categorical_vars = ["gender"]
 
+    # Numeric and encoded columns are written straight into one float matrix
 
-X_train_encoded = pd.DataFrame(X_train_encoded, columns=encoder_feature_names)
-X_train = pd.concat([X_train.reset_index(drop=True),X_train_encoded.reset_index(drop=True)], axis= 1)
-X_train.drop(categorical_vars, axis = 1 , inplace =True)
+    one_hot_encoder = FrameEncoder(categorical_vars, drop = "first")
 
-X_test_encoded = pd.DataFrame(X_test_encoded, columns=encoder_feature_names)
-X_test = pd.concat([X_test.reset_index(drop=True),X_test_encoded.reset_index(drop=True)], axis= 1)
-X_test.drop(categorical_vars, axis = 1 , inplace =True)
+    X_train = one_hot_encoder.fit_transform_frame(X_train)
+    X_test = one_hot_encoder.transform_frame(X_test)
 
-##############################################################################
-# Feature Scaling
-##############################################################################
-scale_norm = MinMaxScaler()
+    ##############################################################################
+    # Feature Scaling
+    ##############################################################################
+    scale_norm = StreamingScaler(method = "minmax")
 
-X_train= pd.DataFrame(scale_norm.fit_transform(X_train), columns=X_train.columns)
-X_test = pd.DataFrame(scale_norm.transform(X_test), columns=X_test.columns)
-##############################################################################
-# Feature Selection
-##############################################################################
+    X_train= pd.DataFrame(scale_norm.fit_transform(X_train), columns=X_train.columns)
+    X_test = pd.DataFrame(scale_norm.transform(X_test), columns=X_test.columns)
+    ##############################################################################
+    # Feature Selection
+    ##############################################################################
 
-from sklearn.ensemble import RandomForestClassifier
+    from sklearn.ensemble import RandomForestClassifier
 
-clf = RandomForestClassifier(random_state= 42)
-feature_selector = RFECV(clf)
+    # The folds run in worker processes, one per core, so each forest builds its
+    # trees in a single thread
+    clf = RandomForestClassifier(random_state= 42)
+    feature_selector = FastRFECV(clf, n_jobs = -1)
 
-fit = feature_selector.fit(X_train,y_train)
+    fit = feature_selector.fit(X_train,y_train)
 
-optimal_feature_count = feature_selector.n_features_
-print(f"Optimal number of features : {optimal_feature_count}")
+    optimal_feature_count = feature_selector.n_features_
+    print(f"Optimal number of features : {optimal_feature_count}")
 
-X_train = X_train.loc[:,feature_selector.get_support()]
-X_test = X_test.loc[:,feature_selector.get_support()]
+    X_train = X_train.loc[:,feature_selector.get_support()]
+    X_test = X_test.loc[:,feature_selector.get_support()]
 
 
-plt.plot(range(1, len(fit.cv_results_['mean_test_score']) + 1), fit.cv_results_['mean_test_score'], marker = "o")
-plt.ylabel("Model Score")
-plt.xlabel("Number of Features")
-plt.title(f"Feature Selection using RFE \n Optimal number of features is {optimal_feature_count} (at score of {round(max(fit.cv_results_['mean_test_score']),4)})")
-plt.tight_layout()
-plt.show()
+    plt.plot(range(1, len(fit.cv_results_['mean_test_score']) + 1), fit.cv_results_['mean_test_score'], marker = "o")
+    plt.ylabel("Model Score")
+    plt.xlabel("Number of Features")
+    plt.title(f"Feature Selection using RFE \n Optimal number of features is {optimal_feature_count} (at score of {round(max(fit.cv_results_['mean_test_score']),4)})")
+    plt.tight_layout()
+    plt.show()
 
 
-################################################################################
-# Model Training
-################################################################################
+    ################################################################################
+    # Model Training
+    ################################################################################
 
-clf = KNeighborsClassifier()
-clf.fit(X_train,y_train)
+    clf = KNeighborsClassifier()
+    clf.fit(X_train,y_train)
 
 
 
-################################################################################
-# Model Assessment
-################################################################################
+    ################################################################################
+    # Model Assessment
+    ################################################################################
 
 
-# Access Model Accuracy
+    # Access Model Accuracy
 
-y_pred_class = clf.predict(X_test)
+    y_pred_class = clf.predict(X_test)
 
-y_pred_prob = clf.predict_proba(X_test)[:,1]
+    y_pred_prob = clf.predict_proba(X_test)[:,1]
 
 
-# Confusion Matrix
+    # Confusion Matrix
 
-conf_matrix = confusion_matrix(y_test,y_pred_class)
+    metrics = ClassificationMetrics().update(y_test, y_pred_class)
+    conf_matrix = metrics.confusion_matrix_
 
-#plt.style.available
+    #plt.style.available
 
-plt.style.use("seaborn-v0_8-poster")
-plt.matshow(conf_matrix, cmap ="coolwarm")
-plt.gca().xaxis.tick_bottom()
-plt.title("Confusion Matrix")
-plt.ylabel("Actual Class")
-plt.xlabel("Predicted Class")
-for (i, j), corr_value in np.ndenumerate(conf_matrix):
-    plt.text(j, i, corr_value, ha = "center",va ="center", fontsize =20)
-plt.show()
+    plt.style.use("seaborn-v0_8-poster")
+    plt.matshow(conf_matrix, cmap ="coolwarm")
+    plt.gca().xaxis.tick_bottom()
+    plt.title("Confusion Matrix")
+    plt.ylabel("Actual Class")
+    plt.xlabel("Predicted Class")
+    for (i, j), corr_value in np.ndenumerate(conf_matrix):
+        plt.text(j, i, corr_value, ha = "center",va ="center", fontsize =20)
+    plt.show()
 
 
 
-# Accuracy (the number of correct classifications out of all attempted classifications)
+    # Accuracy (the number of correct classifications out of all attempted classifications)
 
-accuracy_score(y_test, y_pred_class)
+    metrics.accuracy()
 
 
-# Precision Score ( of all the observations that were predicted as positive, how many were actually positive)
+    # Precision Score ( of all the observations that were predicted as positive, how many were actually positive)
 
-precision_score(y_test, y_pred_class)
+    metrics.precision()
 
-# Recall Score ( of all the positive observations, how many did we predict  positive)
+    # Recall Score ( of all the positive observations, how many did we predict  positive)
 
-recall_score(y_test, y_pred_class)
+    metrics.recall()
 
-# F1 Score (Harmonic Mean of Precision and Recall Score)
+    # F1 Score (Harmonic Mean of Precision and Recall Score)
 
-f1_score(y_test, y_pred_class)
+    metrics.f1()
 
 
-################################################################################
-# Finding the Optimal value of  K
-################################################################################
+    ################################################################################
+    # Finding the Optimal value of  K
+    ################################################################################
 
-k_list = list(range(2,25))
+    k_list = list(range(2,25))
 
-accuracy_scores = []
+    accuracy_scores = []
 
-for k in k_list:
+    for k in k_list:
     
-    clf = KNeighborsClassifier(n_neighbors=k)
-    clf.fit(X_train, y_train)
-    y_pred = clf.predict(X_test)
-    accuracy = f1_score(y_test, y_pred)
-    accuracy_scores.append(accuracy)
+        clf = KNeighborsClassifier(n_neighbors=k)
+        clf.fit(X_train, y_train)
+        y_pred = clf.predict(X_test)
+        accuracy = f1_score(y_test, y_pred)
+        accuracy_scores.append(accuracy)
     
-max_accuracy = max(accuracy_scores)
-max_accuracy_idx = accuracy_scores.index(max_accuracy)
-optimal_value_k = k_list[max_accuracy_idx]
+    max_accuracy = max(accuracy_scores)
+    max_accuracy_idx = accuracy_scores.index(max_accuracy)
+    optimal_value_k = k_list[max_accuracy_idx]
 
 
-# Plot for max depths
+    # Plot for max depths
 
-plt.plot(k_list, accuracy_scores)
-plt.scatter(optimal_value_k, max_accuracy, marker = "x", color ="red")
-plt.title(f"Accuracy (F1 Score ) by k \n Optimal Value for k: {optimal_value_k} (Accuracy: {round(max_accuracy,4)})")
-plt.xlabel("k")
-plt.ylabel("Accuracy (F1 Score)")
-plt.tight_layout()
-plt.show()
+    plt.plot(k_list, accuracy_scores)
+    plt.scatter(optimal_value_k, max_accuracy, marker = "x", color ="red")
+    plt.title(f"Accuracy (F1 Score ) by k \n Optimal Value for k: {optimal_value_k} (Accuracy: {round(max_accuracy,4)})")
+    plt.xlabel("k")
+    plt.ylabel("Accuracy (F1 Score)")
+    plt.tight_layout()
+    plt.show()
 
 
 
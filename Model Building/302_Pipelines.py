@@ -88,6 +88,31 @@ y_pred_class = clf.predict(X_test)
 accuracy_score(y_test,y_pred_class)
 
 
+##############################################################################
+#  Compare models with cross validation
+##############################################################################
+
+# The preprocessing pipeline is fitted once per fold and shared by every model
+# (the same scores as cross validating a Pipeline per model). Use n_jobs = -1
+# to score the models in worker processes from code guarded by
+# if __name__ == "__main__"
+
+import sys
+sys.path.append("..")
+
+from ml_toolkit.model_comparison import compare_models
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.neighbors import KNeighborsClassifier
+
+models = {"logistic_regression" : LogisticRegression(random_state=42),
+          "decision_tree" : DecisionTreeClassifier(random_state=42),
+          "random_forest" : RandomForestClassifier(random_state=42),
+          "knn" : KNeighborsClassifier()}
+
+model_scores = compare_models(preprocessing_pipeline, models, X_train, y_train, cv = 5, scoring = "accuracy")
+print(model_scores)
+
+
 ##############################################################################
 #  Save the Pipeline
 ##############################################################################
@@ -6,10 +6,15 @@
 # Import required Python packages
 
 from sklearn.cluster import KMeans
-from sklearn.preprocessing import MinMaxScaler
 import pandas as pd
 import matplotlib.pyplot as plt
 
+import sys
+sys.path.append("..")
+
+from ml_toolkit.grocery_data import load_sheet
+from ml_toolkit.scaling import StreamingScaler
+
 
 
 ##############################################################################
@@ -19,8 +24,8 @@ import matplotlib.pyplot as plt
 # Import the table
 
 
-transactions = pd.read_excel("data/grocery_database.xlsx",sheet_name= "transactions")
-product_areas = pd.read_excel("data/grocery_database.xlsx",sheet_name= "product_areas")
+transactions = load_sheet("transactions")
+product_areas = load_sheet("product_areas")
 
 
 # Merge on product area name
@@ -68,7 +73,7 @@ data_for_clustering.isna().sum()
 
 # normalize the data
 
-scale_norm = MinMaxScaler()
+scale_norm = StreamingScaler(method = "minmax")
 data_for_clustering_scaled = pd.DataFrame(scale_norm.fit_transform(data_for_clustering),columns=data_for_clustering.columns)
 
 
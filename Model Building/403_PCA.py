@@ -12,9 +12,13 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.utils import shuffle
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
-from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
 
+import sys
+sys.path.append("..")
+
+from ml_toolkit.scaling import StreamingScaler
+
 
 
 ##############################################################################
@@ -70,7 +74,7 @@ X_train,X_test,y_train,y_test = train_test_split(X, y,test_size=0.2,random_state
 ##############################################################################
 
 
-scale_standard = StandardScaler()
+scale_standard = StreamingScaler(method = "standard")
 
 X_train = scale_standard.fit_transform(X_train)
 X_test = scale_standard.transform(X_test)
@@ -11,6 +11,11 @@ from causalimpact import CausalImpact
 
 import pandas as pd
 
+import sys
+sys.path.append("..")
+
+from ml_toolkit.grocery_data import load_sheet
+
 
 ##############################################################################
 # Import and create data
@@ -18,8 +23,8 @@ import pandas as pd
 
 # import data tables
 
-transactions = pd.read_excel("data/grocery_database.xlsx",sheet_name="transactions")
-campaign_data = pd.read_excel("data/grocery_database.xlsx",sheet_name="campaign_data")
+transactions = load_sheet("transactions")
+campaign_data = load_sheet("campaign_data")
 
 # Aggregate transactions data to customer , date level
 
@@ -0,0 +1,102 @@
+##############################################################################
+# Benchmark - size and cold start of random forest artifacts
+##############################################################################
+
+# Fits the 1000 tree RandomForestRegressor of 105 on a synthetic customer
+# table (the features of the ABC Grocery models) and saves it as the pickle
+# 106 writes, as a compiled forest, as a compact one (lossless), compact ones
+# with 16 and 8 bit leaf value codes and a compressed compact one. For each,
+# reports the size on disk and the cold start of 107: a fresh Python process
+# that imports what it needs, loads the model and scores the customers. The
+# largest prediction difference from the pickled forest is checked too, which
+# also leaves the numba kernel of each artifact in numba's cache, as after a
+# first scoring run
+
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.append("..")
+
+from ml_toolkit.compiled_trees import compile_model, load_compiled
+
+
+n_train = 5_000
+n_score = 100_000
+
+rng = np.random.default_rng(42)
+
+
+def customers(n_rows):
+    X = np.column_stack([rng.gamma(2, 1.5, n_rows), rng.uniform(0.3, 1, n_rows), rng.gamma(2, 500, n_rows),
+                         rng.integers(1, 500, n_rows), rng.integers(1, 60, n_rows), rng.integers(1, 6, n_rows),
+                         rng.gamma(2, 20, n_rows), rng.integers(0, 2, n_rows)]).astype(float)
+    y = 0.5 - 0.08 * X[:, 0] + 0.0002 * X[:, 2] + 0.05 * X[:, 5] + rng.normal(0, 0.1, n_rows)
+    return X, y
+
+
+X_train, y_train = customers(n_train)
+X_score, _ = customers(n_score)
+
+regressor = RandomForestRegressor(n_estimators = 1000, random_state = 42)
+regressor.fit(X_train, y_train)
+reference = regressor.predict(X_score)
+
+compiled = compile_model(regressor)
+
+
+def size_on_disk(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def cold_start(load_code, score_path):
+    # Seconds for a new interpreter to import, load and score, timed inside it
+    code = f"""
+import time
+start = time.perf_counter()
+import sys
+import pickle
+import numpy as np
+sys.path.append({os.path.abspath('..')!r})
+{load_code}
+predictions = model.predict(np.load({score_path!r}))
+print(time.perf_counter() - start)
+"""
+    return float(subprocess.run([sys.executable, "-c", code], capture_output = True, text = True,
+                                check = True).stdout)
+
+
+results = []
+
+with tempfile.TemporaryDirectory() as directory:
+    score_path = os.path.join(directory, "to_be_scored.npy")
+    np.save(score_path, X_score)
+
+    pickle_path = os.path.join(directory, "random_forest_regression_model.p")
+    pickle.dump(regressor, open(pickle_path, "wb"))
+    results.append(["pickle", size_on_disk(pickle_path),
+                    cold_start(f"model = pickle.load(open({pickle_path!r}, 'rb'))", score_path), 0.0])
+
+    variants = [("compiled", compiled, False), ("compact", compiled.compact(), False),
+                ("compact, 16 bit values", compiled.compact(value_bits = 16), False),
+                ("compact, 8 bit values", compiled.compact(value_bits = 8), False),
+                ("compact, compressed", compiled.compact(), True)]
+    for name, model, compress in variants:
+        path = os.path.join(directory, name.replace(", ", "_").replace(" ", "_"))
+        model.save(path, compress = compress)
+        load_code = f"from ml_toolkit.compiled_trees import load_compiled\nmodel = load_compiled({path!r})"
+        difference = np.abs(load_compiled(path).predict(X_score) - reference).max()
+        results.append([name, size_on_disk(path), cold_start(load_code, score_path), difference])
+
+
+summary_stats = pd.DataFrame(results, columns = ["artifact", "size (MB)", "cold start (s)", "max difference"])
+summary_stats["size (MB)"] = summary_stats["size (MB)"] / 1e6
+print(summary_stats.round(4))
@@ -0,0 +1,74 @@
+##############################################################################
+# Benchmark - exact splitter vs histogram-binned trees
+##############################################################################
+
+# Fits DecisionTreeRegressor / DecisionTreeClassifier and the histogram trees
+# of ml_toolkit.hist_tree on a synthetic customer table of 10M rows (the
+# features of the ABC Grocery models), with the max_depth and min_samples_leaf
+# used in the scripts, and compares fit time and test set score. Binning is
+# timed separately, since the bins are built once and shared by every tree
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+
+sys.path.append("..")
+
+from ml_toolkit.hist_tree import FeatureBinner, HistogramTreeClassifier, HistogramTreeRegressor
+
+
+n_rows = 10_000_000
+n_test = 1_000_000
+
+rng = np.random.default_rng(42)
+
+X = pd.DataFrame({"distance_from_store" : rng.gamma(2, 1.5, n_rows),
+                  "credit_score" : rng.uniform(0.3, 1, n_rows),
+                  "total_sales" : rng.gamma(2, 500, n_rows),
+                  "total_items" : rng.integers(1, 500, n_rows).astype(float),
+                  "transaction_count" : rng.integers(1, 60, n_rows).astype(float),
+                  "product_area_count" : rng.integers(1, 6, n_rows).astype(float),
+                  "average_basket_value" : rng.gamma(2, 20, n_rows)}).to_numpy()
+
+y_regression = (0.5 - 0.08 * X[:, 0] + 0.0002 * X[:, 2] + 0.05 * X[:, 5] + rng.normal(0, 0.1, n_rows))
+y_classification = (y_regression > np.median(y_regression)).astype(int)
+
+X_train, X_test = X[n_test:], X[:n_test]
+
+start = time.perf_counter()
+binner = FeatureBinner().fit(X_train)
+X_train_binned = binner.transform(X_train)
+binning_seconds = time.perf_counter() - start
+print(f"Binning {len(X_train):,} rows: {binning_seconds:.1f}s")
+
+
+results = []
+
+for name, exact_class, histogram_class, y in [("regression", DecisionTreeRegressor, HistogramTreeRegressor, y_regression),
+                                              ("classification", DecisionTreeClassifier, HistogramTreeClassifier,
+                                               y_classification)]:
+    y_train, y_test = y[n_test:], y[:n_test]
+
+    for max_depth, min_samples_leaf in [(4, 1), (8, 1), (14, 50)]:
+
+        start = time.perf_counter()
+        exact = exact_class(max_depth = max_depth, min_samples_leaf = min_samples_leaf, random_state = 42)
+        exact.fit(X_train, y_train)
+        exact_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        histogram = histogram_class(max_depth = max_depth, min_samples_leaf = min_samples_leaf, binner = binner)
+        histogram.fit(X_train, y_train, binned = X_train_binned)
+        histogram_seconds = time.perf_counter() - start
+
+        results.append([name, max_depth, min_samples_leaf, exact_seconds, histogram_seconds,
+                        exact.score(X_test, y_test), histogram.score(X_test, y_test)])
+
+
+summary_stats = pd.DataFrame(results, columns = ["task", "max_depth", "min_samples_leaf", "exact fit (s)",
+                                                 "histogram fit (s)", "exact score", "histogram score"])
+summary_stats["speedup"] = summary_stats["exact fit (s)"] / summary_stats["histogram fit (s)"]
+print(summary_stats.round(4))
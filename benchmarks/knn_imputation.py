@@ -0,0 +1,60 @@
+##############################################################################
+# Benchmark - KNNImputer vs IndexedKNNImputer
+##############################################################################
+
+# Checks that ml_toolkit.knn_imputation.IndexedKNNImputer matches KNNImputer on
+# small data, then times both as the number of rows grows (KNNImputer is only
+# run while its full distance matrix stays affordable)
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.impute import KNNImputer
+
+sys.path.append("..")
+
+from ml_toolkit.knn_imputation import IndexedKNNImputer
+
+
+def make_data(n_rows, n_features = 6, missing_rate = 0.05, seed = 42):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size = (n_rows, n_features))
+    X[rng.random(X.shape) < missing_rate] = np.nan
+    return X
+
+
+# Results match KNNImputer (on continuous data, where no two donors tie at the
+# n_neighbors-th distance; see the ml_toolkit.knn_imputation docstring)
+
+for weights in ["uniform", "distance"]:
+    X = make_data(2_000)
+    expected = KNNImputer(n_neighbors = 5, weights = weights).fit_transform(X)
+    result = IndexedKNNImputer(n_neighbors = 5, weights = weights).fit_transform(X)
+    assert np.allclose(expected, result), weights
+
+
+# Scaling
+
+timings = []
+
+for n_rows in [10_000, 30_000, 100_000, 300_000, 1_000_000]:
+
+    X = make_data(n_rows)
+
+    start = time.perf_counter()
+    IndexedKNNImputer(n_neighbors = 5, weights = "distance").fit_transform(X)
+    indexed_seconds = time.perf_counter() - start
+
+    knn_seconds = np.nan
+    if n_rows <= 30_000:
+        start = time.perf_counter()
+        KNNImputer(n_neighbors = 5, weights = "distance").fit_transform(X)
+        knn_seconds = time.perf_counter() - start
+
+    timings.append([n_rows, knn_seconds, indexed_seconds])
+
+
+summary_stats = pd.DataFrame(timings, columns = ["rows", "KNNImputer (s)", "IndexedKNNImputer (s)"])
+print(summary_stats.round(3))
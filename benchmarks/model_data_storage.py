@@ -0,0 +1,67 @@
+##############################################################################
+# Benchmark - Pickled DataFrames vs Column Store Model Data
+##############################################################################
+
+# Compares saving and loading a model dataset shaped like abc_regression_modelling
+# as a pickle against the memory-mapped column store in ml_toolkit.model_data,
+# both for the full frame and for the columns used in modelling only
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("..")
+
+from ml_toolkit.model_data import load_model_data, save_model_data
+
+
+n_rows = 10_000_000
+
+rng = np.random.default_rng(42)
+
+my_df = pd.DataFrame({"customer_id" : np.arange(n_rows),
+                      "distance_from_store" : rng.gamma(2, 1.5, n_rows),
+                      "gender" : rng.choice(["M","F"], n_rows),
+                      "credit_score" : rng.uniform(0.3, 1, n_rows),
+                      "customer_loyalty_score" : rng.uniform(0, 1, n_rows),
+                      "total_sales" : rng.gamma(2, 500, n_rows),
+                      "total_items" : rng.integers(1, 500, n_rows),
+                      "transaction_count" : rng.integers(1, 60, n_rows),
+                      "product_area_count" : rng.integers(1, 6, n_rows)})
+my_df["average_basket_value"] = my_df["total_sales"] / my_df["transaction_count"]
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+
+    pickle_path = os.path.join(tmp_dir, "abc_regression_modelling.p")
+
+    _, pickle_save = timed(lambda: my_df.to_pickle(pickle_path))
+    _, store_save = timed(lambda: save_model_data(my_df, "abc_regression_modelling", tmp_dir))
+
+    _, pickle_load = timed(lambda: pd.read_pickle(pickle_path).drop("customer_id", axis = 1))
+    _, store_load = timed(lambda: load_model_data("abc_regression_modelling", exclude = ["customer_id"],
+                                                  model_data_dir = tmp_dir))
+    loaded, store_touch = timed(lambda: load_model_data("abc_regression_modelling", exclude = ["customer_id"],
+                                                        model_data_dir = tmp_dir).sum(numeric_only = True))
+
+    pickle_size = os.path.getsize(pickle_path)
+    store_dir = os.path.join(tmp_dir, "abc_regression_modelling")
+    store_size = sum(os.path.getsize(os.path.join(store_dir, f)) for f in os.listdir(store_dir))
+
+
+summary_stats = pd.DataFrame({"pickle" : [pickle_save, pickle_load, np.nan, pickle_size / 1e6],
+                              "column_store" : [store_save, store_load, store_touch, store_size / 1e6]},
+                             index = ["save (s)", "load without customer_id (s)", "load and scan every column (s)", "size (MB)"])
+
+print(f"{n_rows:,} rows")
+print(summary_stats.round(3))
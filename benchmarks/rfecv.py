@@ -0,0 +1,59 @@
+##############################################################################
+# Benchmark - RFECV vs FastRFECV
+##############################################################################
+
+# Checks that ml_toolkit.feature_elimination.FastRFECV selects the same
+# features with the same cross validated scores as RFECV, then times both for
+# the three rankers used in the Model Building scripts
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification, make_regression
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_selection import RFECV
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+sys.path.append("..")
+
+from ml_toolkit.feature_elimination import FastRFECV
+
+
+def compare(name, estimator, X, y, n_jobs):
+
+    start = time.perf_counter()
+    expected = RFECV(estimator).fit(X, y)
+    rfecv_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = FastRFECV(estimator, n_jobs = n_jobs).fit(X, y)
+    fast_seconds = time.perf_counter() - start
+
+    same_support = (expected.n_features_ == result.n_features_ and
+                    (expected.get_support() == result.get_support()).all())
+    score_difference = np.abs(expected.cv_results_["mean_test_score"] - result.cv_results_["mean_test_score"]).max()
+
+    return [name, len(y), X.shape[1], rfecv_seconds, fast_seconds, same_support, score_difference]
+
+
+if __name__ == "__main__":
+
+    X_regression, y_regression = make_regression(n_samples = 200_000, n_features = 40, n_informative = 15,
+                                                  noise = 10, random_state = 42)
+    X_classification, y_classification = make_classification(n_samples = 50_000, n_features = 25,
+                                                              n_informative = 8, random_state = 42)
+    X_forest, y_forest = make_classification(n_samples = 2_000, n_features = 12, n_informative = 5,
+                                             random_state = 42)
+
+    results = [compare("LinearRegression", LinearRegression(), X_regression, y_regression, n_jobs = -1),
+               compare("LogisticRegression", LogisticRegression(random_state = 42, max_iter = 1000),
+                       X_classification, y_classification, n_jobs = -1),
+               compare("RandomForestClassifier", RandomForestClassifier(random_state = 42),
+                       X_forest, y_forest, n_jobs = -1)]
+
+    summary_stats = pd.DataFrame(results, columns = ["ranker", "rows", "features", "RFECV (s)", "FastRFECV (s)",
+                                                     "same selection", "max score difference"])
+    summary_stats["speedup"] = summary_stats["RFECV (s)"] / summary_stats["FastRFECV (s)"]
+    print(summary_stats.round(4).to_string())
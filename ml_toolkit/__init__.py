@@ -0,0 +1,8 @@
+"""
+Reusable components shared by the Data Preparation and Model Building scripts.
+
+The scripts are run from their own folder, so they import this package with
+
+    import sys
+    sys.path.append("..")
+"""
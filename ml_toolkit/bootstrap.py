@@ -0,0 +1,100 @@
+"""
+Bootstrap confidence intervals for test set metrics, all replicates at once.
+
+A naive bootstrap resamples the test set and calls the metric function once
+per replicate. Here a block of replicates is drawn as a count matrix W (one
+row per replicate, how many times each test row was drawn, multinomial
+weights), and the handful of sums every metric needs are weighted reductions
+W @ columns: y, y squared and squared residuals for R-squared; true
+positive, false positive, false negative and correct indicators for the
+classification metrics. Replicates are processed chunk_size at a time to
+bound the size of W, with the chunks spread over worker processes. Each
+chunk has its own seed spawned from random_state, so the results do not
+depend on n_jobs.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ml_toolkit.parallel import map_tasks
+
+
+REGRESSION_METRICS = ("r2",)
+CLASSIFICATION_METRICS = ("accuracy", "precision", "recall", "f1")
+
+
+def bootstrap_metrics(y_true, y_pred, metrics=("r2",), n_replicates=1000, confidence=0.95, chunk_size=100,
+                      random_state=None, n_jobs=1, pos_label=1):
+    """
+    Percentile bootstrap intervals of metrics (from REGRESSION_METRICS or
+    CLASSIFICATION_METRICS) over the test predictions.
+
+    Returns a DataFrame indexed by metric with the estimate on the full test
+    set, the bootstrap std_error and the lower and upper interval bounds.
+    n_jobs is the number of worker processes (see ml_toolkit.parallel).
+    """
+    metrics = list(metrics)
+    is_regression = _check_metrics(metrics)
+    columns = _metric_columns(y_true, y_pred, is_regression, pos_label)
+
+    seeds = np.random.SeedSequence(random_state).spawn(-(-n_replicates // chunk_size))
+    sizes = [min(chunk_size, n_replicates - start) for start in range(0, n_replicates, chunk_size)]
+    sums = np.vstack(map_tasks(((_weighted_sums, columns, size, seed) for size, seed in zip(sizes, seeds)), n_jobs))
+    replicates = _metrics_from_sums(sums, len(columns), metrics, is_regression)
+    estimates = _metrics_from_sums(columns.sum(axis=0, keepdims=True), len(columns), metrics, is_regression)
+
+    alpha = (1 - confidence) / 2
+    return pd.DataFrame({"estimate": [estimates[metric][0] for metric in metrics],
+                         "std_error": [np.nanstd(replicates[metric], ddof=1) for metric in metrics],
+                         "lower": [np.nanquantile(replicates[metric], alpha) for metric in metrics],
+                         "upper": [np.nanquantile(replicates[metric], 1 - alpha) for metric in metrics]},
+                        index=pd.Index(metrics, name="metric"))
+
+
+def _check_metrics(metrics):
+    unknown = set(metrics) - set(REGRESSION_METRICS) - set(CLASSIFICATION_METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics {sorted(unknown)}")
+    is_regression = set(metrics) <= set(REGRESSION_METRICS)
+    if not is_regression and set(metrics) & set(REGRESSION_METRICS):
+        raise ValueError("Regression and classification metrics cannot be mixed")
+    return is_regression
+
+
+def _metric_columns(y_true, y_pred, is_regression, pos_label):
+    # Per row quantities whose (weighted) sums give every metric
+    if is_regression:
+        y_true = np.asarray(y_true, dtype=float).ravel()
+        residuals = y_true - np.asarray(y_pred, dtype=float).ravel()
+        # Centring leaves R-squared unchanged and avoids cancellation in its total sum of squares
+        y_centred = y_true - y_true.mean()
+        return np.column_stack([y_centred, y_centred ** 2, residuals ** 2])
+    y_true = np.asarray(y_true).ravel()
+    y_pred = np.asarray(y_pred).ravel()
+    actual = y_true == pos_label
+    predicted = y_pred == pos_label
+    return np.column_stack([actual & predicted, ~actual & predicted, actual & ~predicted,
+                            y_true == y_pred]).astype(float)
+
+
+def _weighted_sums(columns, n_replicates, seed):
+    rng = np.random.default_rng(seed)
+    n_rows = len(columns)
+    counts = rng.multinomial(n_rows, np.full(n_rows, 1 / n_rows), size=n_replicates)
+    return counts @ columns
+
+
+def _metrics_from_sums(sums, n_rows, metrics, is_regression):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if is_regression:
+            y_sum, y_squared_sum, residual_sum_squares = sums.T
+            total_sum_squares = y_squared_sum - y_sum ** 2 / n_rows
+            return {"r2": np.where(total_sum_squares > 0, 1 - residual_sum_squares / total_sum_squares, np.nan)}
+
+        tp, fp, fn, correct = sums.T
+        # Undefined ratios are 0, as with zero_division=0
+        values = {"accuracy": correct / n_rows,
+                  "precision": np.nan_to_num(tp / (tp + fp)),
+                  "recall": np.nan_to_num(tp / (tp + fn)),
+                  "f1": np.nan_to_num(2 * tp / (2 * tp + fp + fn))}
+    return {metric: values[metric] for metric in metrics}
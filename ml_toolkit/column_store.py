@@ -0,0 +1,166 @@
+"""
+Columnar on-disk storage for DataFrames.
+
+A table is a directory holding one .npy file per column plus a schema.json
+header recording column names, dtypes, categorical levels and free-form
+metadata. Columns are opened with numpy memory-mapping, so every process that
+reads the same table shares one copy of it in the page cache and a column that
+is not requested is never read at all.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+
+SCHEMA_FILE = "schema.json"
+FORMAT_VERSION = 1
+
+
+def write_table(df, path, metadata=None):
+    """
+    Write df to the table directory path, replacing any table already there.
+
+    Numeric, boolean and datetime columns are stored as raw numpy arrays.
+    Object, string and categorical columns are stored as integer codes with
+    their levels kept in the schema. The index is stored unless it is the
+    default RangeIndex.
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    columns = []
+    for position, name in enumerate(df.columns):
+        file_name = f"c{position:04d}.npy"
+        entry = _write_column(df.iloc[:, position], os.path.join(tmp_path, file_name))
+        entry["name"] = _json_label(name)
+        entry["file"] = file_name
+        columns.append(entry)
+
+    index = None
+    if not _is_default_index(df.index):
+        index = _write_column(pd.Series(df.index), os.path.join(tmp_path, "index.npy"))
+        index["name"] = _json_label(df.index.name)
+        index["file"] = "index.npy"
+
+    schema = {"format_version": FORMAT_VERSION,
+              "n_rows": len(df),
+              "columns": columns,
+              "index": index,
+              "metadata": metadata or {}}
+    _dump_schema(schema, tmp_path)
+
+    # Swap the finished table in so readers never see a half written one
+    old_path = f"{path}.old{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+
+
+def read_schema(path):
+    """Return the parsed schema.json header of the table at path."""
+    with open(os.path.join(path, SCHEMA_FILE)) as schema_file:
+        schema = json.load(schema_file)
+    if schema.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported column store version in {path}: {schema.get('format_version')}")
+    return schema
+
+
+def update_metadata(path, metadata):
+    """Merge metadata into the schema header of an existing table."""
+    schema = read_schema(path)
+    schema["metadata"].update(metadata)
+    _dump_schema(schema, path)
+
+
+def read_table(path, columns=None, mmap_mode="c", categorical=False):
+    """
+    Load the table at path as a DataFrame.
+
+    columns restricts the load to a subset of columns, in the given order;
+    files of the other columns are never opened. With the default mmap_mode
+    "c" numeric columns are copy-on-write memory maps: reads share the page
+    cache, in-place edits stay private to the process. Use mmap_mode=None to
+    read everything into private memory. Coded columns come back as object
+    columns, or as pandas Categoricals when categorical is True.
+    """
+    schema = read_schema(path)
+    entries = schema["columns"]
+
+    if columns is not None:
+        by_name = {entry["name"]: entry for entry in entries}
+        missing = [column for column in columns if column not in by_name]
+        if missing:
+            raise KeyError(f"Columns not found in {path}: {missing}")
+        entries = [by_name[column] for column in columns]
+
+    index = None
+    if schema["index"] is not None:
+        index = pd.Index(_read_column(path, schema["index"], mmap_mode, categorical),
+                         name=schema["index"]["name"])
+
+    data = {entry["name"]: _read_column(path, entry, mmap_mode, categorical) for entry in entries}
+
+    if not data:
+        return pd.DataFrame(index=index if index is not None else pd.RangeIndex(schema["n_rows"]))
+
+    return pd.DataFrame(data, index=index, columns=[entry["name"] for entry in entries], copy=False)
+
+
+def _write_column(series, file_path):
+
+    dtype = series.dtype
+
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+        np.save(file_path, np.ascontiguousarray(series.to_numpy()))
+        return {"kind": "array", "dtype": dtype.str}
+
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(dtype) \
+            or pd.api.types.is_string_dtype(dtype):
+        categorical = pd.Categorical(series)
+        np.save(file_path, np.ascontiguousarray(categorical.codes))
+        return {"kind": "coded",
+                "dtype": categorical.codes.dtype.str,
+                "categories": [_json_label(level) for level in categorical.categories],
+                "ordered": bool(categorical.ordered)}
+
+    raise TypeError(f"Column {series.name!r} has unsupported dtype {dtype}")
+
+
+def _read_column(path, entry, mmap_mode, categorical):
+
+    values = np.load(os.path.join(path, entry["file"]), mmap_mode=mmap_mode)
+
+    if entry["kind"] == "array":
+        return values
+
+    levels = pd.Categorical.from_codes(values, categories=entry["categories"], ordered=entry["ordered"])
+    if categorical:
+        return levels
+    return np.asarray(levels, dtype=object)
+
+
+def _json_label(label):
+    if isinstance(label, np.generic):
+        label = label.item()
+    if label is None or isinstance(label, (str, int, float, bool)):
+        return label
+    raise TypeError(f"Label {label!r} can not be stored in a column store schema")
+
+
+def _is_default_index(index):
+    return isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1 and index.name is None
+
+
+def _dump_schema(schema, path):
+    tmp_file = os.path.join(path, f"{SCHEMA_FILE}.tmp{os.getpid()}")
+    with open(tmp_file, "w") as schema_file:
+        json.dump(schema, schema_file, indent=1)
+    os.replace(tmp_file, os.path.join(path, SCHEMA_FILE))
@@ -0,0 +1,147 @@
+"""
+Correlation screening for wide feature sets without the full p x p matrix.
+
+DataFrame.corr builds a dense float64 p x p matrix (20 GB for 50k features).
+Here the columns are standardised once into a float32, column-major copy and
+correlations are computed tile by tile with float32 matrix products across a
+thread pool. Each tile is reduced straight away to the pairs above a |r|
+threshold, or to the top-k partners of each feature, so memory beyond the
+data itself is bounded by tile_size x tile_size per thread.
+
+Missing values are replaced by the column mean (they then add nothing to the
+correlation), rather than dropped pairwise as in DataFrame.corr. Constant
+columns correlate with nothing.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def correlated_pairs(X, threshold=0.9, tile_size=1024, n_jobs=None):
+    """
+    Edge list of every feature pair with |correlation| >= threshold.
+
+    Returns a DataFrame with feature_1, feature_2 and correlation, strongest
+    first.
+    """
+    names, standardised = _standardise(X)
+    n_features = standardised.shape[1]
+    tiles = [(start_1, start_2) for start_1 in range(0, n_features, tile_size)
+             for start_2 in range(start_1, n_features, tile_size)]
+
+    def tile_pairs(starts):
+        start_1, start_2 = starts
+        block = _tile(standardised, start_1, start_2, tile_size)
+        rows, columns = np.nonzero(np.abs(block) >= threshold)
+        if start_1 == start_2:
+            above_diagonal = rows < columns
+            rows, columns = rows[above_diagonal], columns[above_diagonal]
+        return start_1 + rows, start_2 + columns, block[rows, columns]
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        results = list(executor.map(tile_pairs, tiles))
+
+    feature_1 = np.concatenate([result[0] for result in results])
+    feature_2 = np.concatenate([result[1] for result in results])
+    correlation = np.concatenate([result[2] for result in results]).astype(np.float64)
+
+    edges = pd.DataFrame({"feature_1": names[feature_1], "feature_2": names[feature_2], "correlation": correlation})
+    order = np.argsort(-np.abs(correlation), kind="stable")
+    return edges.iloc[order].reset_index(drop=True)
+
+
+def top_correlated(X, k=5, tile_size=1024, n_jobs=None):
+    """
+    The k strongest (by |r|) partners of every feature.
+
+    Returns a DataFrame with feature, partner and correlation, k rows per
+    feature ordered from the strongest partner down.
+    """
+    names, standardised = _standardise(X)
+    n_features = standardised.shape[1]
+    k = min(k, n_features - 1)
+
+    def block_partners(start_1):
+        stop_1 = min(start_1 + tile_size, n_features)
+        best_strength = np.full((stop_1 - start_1, k), -np.inf, dtype=np.float32)
+        best_correlation = np.zeros((stop_1 - start_1, k), dtype=np.float32)
+        best_partner = np.zeros((stop_1 - start_1, k), dtype=np.int64)
+
+        for start_2 in range(0, n_features, tile_size):
+            block = _tile(standardised, start_1, start_2, tile_size)
+            strength = np.abs(block)
+            # A feature is not its own partner
+            own = np.arange(start_1, stop_1) - start_2
+            has_own = (own >= 0) & (own < block.shape[1])
+            strength[np.flatnonzero(has_own), own[has_own]] = -np.inf
+
+            strength = np.hstack([best_strength, strength])
+            correlation = np.hstack([best_correlation, block])
+            partner = np.hstack([best_partner, np.broadcast_to(np.arange(start_2, start_2 + block.shape[1]),
+                                                               block.shape)])
+            keep = np.argpartition(-strength, k - 1, axis=1)[:, :k]
+            best_strength = np.take_along_axis(strength, keep, axis=1)
+            best_correlation = np.take_along_axis(correlation, keep, axis=1)
+            best_partner = np.take_along_axis(partner, keep, axis=1)
+
+        order = np.argsort(-best_strength, axis=1, kind="stable")
+        return (np.take_along_axis(best_partner, order, axis=1),
+                np.take_along_axis(best_correlation, order, axis=1))
+
+    if k < 1:
+        return pd.DataFrame({"feature": [], "partner": [], "correlation": []})
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        results = list(executor.map(block_partners, range(0, n_features, tile_size)))
+
+    partners = np.vstack([result[0] for result in results])
+    correlations = np.vstack([result[1] for result in results])
+    return pd.DataFrame({"feature": np.repeat(names, k),
+                         "partner": names[partners.ravel()],
+                         "correlation": correlations.ravel().astype(np.float64)})
+
+
+def propose_drops(edges):
+    """
+    Greedy redundancy pruning over an edge list from correlated_pairs.
+
+    Walking the pairs from the strongest down, whenever both features are
+    still kept the one with more highly correlated partners is proposed for
+    dropping (feature_2 on a tie). Returns the proposed columns in that order.
+    """
+    degree = pd.concat([edges["feature_1"], edges["feature_2"]]).value_counts()
+    order = np.argsort(-edges["correlation"].abs().to_numpy(), kind="stable")
+
+    dropped = []
+    dropped_set = set()
+    for feature_1, feature_2 in edges[["feature_1", "feature_2"]].to_numpy()[order]:
+        if feature_1 in dropped_set or feature_2 in dropped_set:
+            continue
+        drop = feature_1 if degree[feature_1] > degree[feature_2] else feature_2
+        dropped.append(drop)
+        dropped_set.add(drop)
+    return dropped
+
+
+def _standardise(X):
+    # Centred, unit-norm float32 columns in column-major order, so that
+    # Z[:, a].T @ Z[:, b] is the correlation of a and b
+    if isinstance(X, pd.DataFrame):
+        names = np.asarray(X.columns, dtype=object)
+    else:
+        names = np.arange(np.shape(X)[1])
+
+    standardised = np.array(X, dtype=np.float32, order="F")
+    mean = np.nanmean(standardised, axis=0, dtype=np.float64)
+    standardised -= mean.astype(np.float32)
+    standardised[np.isnan(standardised)] = 0
+    norm = np.sqrt(np.einsum("ij,ij->j", standardised, standardised, dtype=np.float64))
+    norm[norm == 0] = np.inf
+    standardised /= norm.astype(np.float32)
+    return names, standardised
+
+
+def _tile(standardised, start_1, start_2, tile_size):
+    return standardised[:, start_1:start_1 + tile_size].T @ standardised[:, start_2:start_2 + tile_size]
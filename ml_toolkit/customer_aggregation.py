@@ -0,0 +1,140 @@
+"""
+Out-of-core customer level aggregation of the transactions table.
+
+Transactions are read in fixed-size chunks and each chunk is reduced to a
+partial aggregate: per customer sums of sales_cost and num_items, a count of
+transaction_id, and the distinct (customer_id, product_area_id) pairs seen. A
+partial aggregate only grows with the number of customers (times the handful
+of product areas), so partials can be merged as they arrive and peak memory is
+bounded by the chunk size plus the customer count, never by the transaction
+volume. The distinct product area count is exact.
+
+Chunks can be summarised in a process pool (see ml_toolkit.parallel).
+"""
+
+import os
+
+import pandas as pd
+
+from ml_toolkit import column_store
+from ml_toolkit.parallel import fold_tasks
+
+
+TRANSACTION_COLUMNS = ["customer_id", "sales_cost", "num_items", "transaction_id", "product_area_id"]
+
+
+def summarise_transactions(source, chunk_size=1_000_000, n_jobs=1):
+    """
+    Build the customer level sales summary from source.
+
+    source is a DataFrame, a .csv file or a column store table directory (for
+    example ml_toolkit.grocery_data.sheet_path("transactions")). Returns the
+    same frame as
+
+        transactions.groupby("customer_id").agg({"sales_cost": "sum",
+                                                 "num_items": "sum",
+                                                 "transaction_id": "count",
+                                                 "product_area_id": "nunique"}).reset_index()
+
+    with the columns renamed to customer_id, total_sales, total_items,
+    transaction_count and product_area_count.
+    """
+    return finalise_partial(aggregate_partials(source, chunk_size, n_jobs))
+
+
+def aggregate_partials(source, chunk_size=1_000_000, n_jobs=1, start_row=0):
+    """
+    Return the merged partial aggregate of every chunk of source.
+
+    Rows before start_row are skipped. n_jobs is the number of worker
+    processes; None or -1 uses every core.
+    """
+    merged = fold_tasks(_iter_tasks(source, chunk_size, start_row), merge_partials, n_jobs)
+    return merged if merged is not None else empty_partial()
+
+
+def summarise_chunk(chunk):
+    """
+    Reduce a chunk of transactions to a partial aggregate.
+
+    A partial is a (totals, areas) pair: totals is indexed by customer_id and
+    holds total_sales, total_items and transaction_count; areas holds the
+    distinct non-missing (customer_id, product_area_id) pairs.
+    """
+    totals = chunk.groupby("customer_id").agg(total_sales=("sales_cost", "sum"),
+                                              total_items=("num_items", "sum"),
+                                              transaction_count=("transaction_id", "count"))
+    areas = chunk[["customer_id", "product_area_id"]].dropna().drop_duplicates()
+    return totals, areas
+
+
+def merge_partials(left, right):
+    """Combine two partial aggregates; either may be None."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    totals = pd.concat([left[0], right[0]]).groupby(level=0).sum()
+    areas = pd.concat([left[1], right[1]], ignore_index=True).drop_duplicates()
+    return totals, areas
+
+
+def empty_partial():
+    """Partial aggregate of zero transactions."""
+    totals = pd.DataFrame({"total_sales": pd.Series(dtype="float64"),
+                           "total_items": pd.Series(dtype="int64"),
+                           "transaction_count": pd.Series(dtype="int64")},
+                          index=pd.Index([], name="customer_id"))
+    areas = pd.DataFrame({"customer_id": pd.Series(dtype="int64"),
+                          "product_area_id": pd.Series(dtype="int64")})
+    return totals, areas
+
+
+def finalise_partial(partial):
+    """Turn a partial aggregate into the customer level sales summary."""
+    totals, areas = partial
+    product_area_count = areas.groupby("customer_id")["product_area_id"].nunique()
+
+    sales_summary = totals.copy()
+    sales_summary["product_area_count"] = product_area_count.reindex(totals.index, fill_value=0).astype("int64")
+    sales_summary.index.name = "customer_id"
+    return sales_summary.reset_index()
+
+
+def iter_chunks(source, chunk_size, start_row=0):
+    """Yield source from start_row on as DataFrames of at most chunk_size transactions."""
+    if isinstance(source, pd.DataFrame):
+        for start in range(start_row, len(source), chunk_size):
+            yield source.iloc[start:start + chunk_size]
+    elif os.path.isdir(source):
+        for start, stop in _row_ranges(source, chunk_size, start_row):
+            yield read_table_slice(source, start, stop)
+    else:
+        yield from pd.read_csv(source, usecols=TRANSACTION_COLUMNS, chunksize=chunk_size,
+                               skiprows=range(1, start_row + 1))
+
+
+def _iter_tasks(source, chunk_size, start_row):
+    # Column store slices are read by the workers themselves from the shared
+    # memory map, everything else is chunked here and shipped to them
+    if isinstance(source, str) and os.path.isdir(source):
+        for start, stop in _row_ranges(source, chunk_size, start_row):
+            yield _summarise_table_slice, source, start, stop
+    else:
+        for chunk in iter_chunks(source, chunk_size, start_row):
+            yield summarise_chunk, chunk
+
+
+def _row_ranges(table_path, chunk_size, start_row=0):
+    n_rows = column_store.read_schema(table_path)["n_rows"]
+    for start in range(start_row, n_rows, chunk_size):
+        yield start, min(start + chunk_size, n_rows)
+
+
+def read_table_slice(table_path, start, stop):
+    """Return rows start:stop of the transaction columns of a column store table."""
+    return column_store.read_table(table_path, columns=TRANSACTION_COLUMNS).iloc[start:stop]
+
+
+def _summarise_table_slice(table_path, start, stop):
+    return summarise_chunk(read_table_slice(table_path, start, stop))
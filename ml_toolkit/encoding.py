@@ -0,0 +1,172 @@
+"""
+One hot encoding of categorical columns straight into the model matrix.
+
+The advanced scripts used to encode with OneHotEncoder(sparse_output=False),
+wrap the result in a DataFrame, reset_index both frames, pd.concat them and
+drop the original columns, copying the feature matrix twice per split.
+FrameEncoder writes the numeric columns and the encoded columns into one
+preallocated float matrix (or builds the CSR arrays directly) and keeps the
+output column names.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class FrameEncoder:
+    """
+    One hot encode categorical_vars and pass every other column through.
+
+    Output columns are the numeric columns in their original order followed by
+    the encoded columns, named like OneHotEncoder.get_feature_names_out
+    ("gender_M"). drop="first" drops the first (sorted) level of every
+    variable, drop=None keeps all. handle_unknown="ignore" encodes unseen or
+    missing levels as all zeros instead of raising.
+
+    For high cardinality variables (product areas, stores) use
+    sparse_output=True, so memory grows with the non-zeros rather than with
+    rows x levels, together with either
+
+    - min_frequency: levels seen fewer times than this in fit share a single
+      "<var>_infrequent" column, which also takes levels never seen in fit
+      (as OneHotEncoder's handle_unknown="infrequent_if_exist"; a variable
+      without infrequent levels follows handle_unknown), or
+    - n_hash_features: each variable is hashed into that many columns
+      ("<var>_hash0", ...) without learning its levels; unseen levels are
+      hashed like any other and drop does not apply.
+
+    LinearRegression and LogisticRegression train and score on the CSR matrix
+    directly.
+    """
+
+    def __init__(self, categorical_vars, drop="first", sparse_output=False, handle_unknown="error",
+                 min_frequency=None, n_hash_features=None, dtype=np.float64):
+        if drop not in ("first", None):
+            raise ValueError(f"drop must be 'first' or None, got {drop!r}")
+        if handle_unknown not in ("error", "ignore"):
+            raise ValueError(f"handle_unknown must be 'error' or 'ignore', got {handle_unknown!r}")
+        if min_frequency is not None and n_hash_features is not None:
+            raise ValueError("Use either min_frequency or n_hash_features, not both")
+        self.categorical_vars = list(categorical_vars)
+        self.drop = drop
+        self.sparse_output = sparse_output
+        self.handle_unknown = handle_unknown
+        self.min_frequency = min_frequency
+        self.n_hash_features = n_hash_features
+        self.dtype = dtype
+
+    def fit(self, df):
+        """Learn the numeric columns and the levels of each categorical variable."""
+        self.numeric_columns_ = [column for column in df.columns if column not in self.categorical_vars]
+        self.encoded_columns_ = []
+
+        if self.n_hash_features is not None:
+            self.categories_ = None
+            self.infrequent_categories_ = None
+            for var in self.categorical_vars:
+                self.encoded_columns_ += [f"{var}_hash{j}" for j in range(self.n_hash_features)]
+            self.feature_names_out_ = self.numeric_columns_ + self.encoded_columns_
+            return self
+
+        self.categories_ = []
+        self.infrequent_categories_ = []
+        first_level = 1 if self.drop == "first" else 0
+        for var in self.categorical_vars:
+            counts = df[var].value_counts()
+            is_frequent = counts >= (self.min_frequency or 0)
+            levels = counts.index[is_frequent].sort_values()
+            infrequent_levels = counts.index[~is_frequent]
+            self.categories_.append(levels)
+            self.infrequent_categories_.append(infrequent_levels)
+
+            level_names = [f"{var}_{level}" for level in levels]
+            if len(infrequent_levels):
+                level_names.append(f"{var}_infrequent")
+            self.encoded_columns_ += level_names[first_level:]
+
+        self.feature_names_out_ = self.numeric_columns_ + self.encoded_columns_
+        return self
+
+    def transform(self, df):
+        """Return the encoded float matrix (CSR when sparse_output is True)."""
+        if self.sparse_output:
+            return self._transform_sparse(df)
+
+        n_numeric = len(self.numeric_columns_)
+        matrix = np.zeros((len(df), len(self.feature_names_out_)), dtype=self.dtype)
+
+        for position, column in enumerate(self.numeric_columns_):
+            matrix[:, position] = df[column].to_numpy()
+
+        for rows, columns in self._encoded_positions(df):
+            matrix[rows, n_numeric + columns] = 1
+        return matrix
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def transform_frame(self, df):
+        """transform wrapped in a DataFrame with feature_names_out_ columns and a fresh RangeIndex."""
+        matrix = self.transform(df)
+        if sparse.issparse(matrix):
+            return pd.DataFrame.sparse.from_spmatrix(matrix, columns=self.feature_names_out_)
+        return pd.DataFrame(matrix, columns=self.feature_names_out_, copy=False)
+
+    def fit_transform_frame(self, df):
+        return self.fit(df).transform_frame(df)
+
+    def get_feature_names_out(self):
+        return np.array(self.feature_names_out_, dtype=object)
+
+    def _encoded_positions(self, df):
+        # (row positions, encoded column positions) of the ones for each variable
+        if self.n_hash_features is not None:
+            for position, var in enumerate(self.categorical_vars):
+                offset = position * self.n_hash_features
+                values = df[var]
+                rows = np.flatnonzero(values.notna().to_numpy())
+                hashes = pd.util.hash_array(values.to_numpy(dtype=object)[rows])
+                yield rows, offset + (hashes % np.uint64(self.n_hash_features)).astype(np.int64)
+            return
+
+        offset = 0
+        first_level = 1 if self.drop == "first" else 0
+        for var, levels, infrequent_levels in zip(self.categorical_vars, self.categories_,
+                                                  self.infrequent_categories_):
+            values = df[var]
+            codes = pd.Categorical(values, categories=levels).codes.astype(np.int64)
+            if len(infrequent_levels):
+                # The infrequent bucket is the column after the last frequent level; it
+                # takes every level that is not frequent, including those unseen in fit
+                codes[(codes < 0) & values.notna().to_numpy()] = len(levels)
+            if self.handle_unknown == "error" and (codes < 0).any():
+                unknown = pd.unique(values[codes < 0])
+                raise ValueError(f"Found unknown categories {list(unknown)} in column {var!r}")
+            rows = np.flatnonzero(codes >= first_level)
+            yield rows, offset + codes[rows] - first_level
+            offset += max(len(levels) + (1 if len(infrequent_levels) else 0) - first_level, 0)
+
+    def _transform_sparse(self, df):
+        # Every row holds its numeric values plus at most one one per variable,
+        # laid out as fixed slots and compressed to CSR by masking the empty ones
+        n_rows = len(df)
+        n_numeric = len(self.numeric_columns_)
+        n_slots = n_numeric + len(self.categorical_vars)
+
+        values = np.ones((n_rows, n_slots), dtype=self.dtype)
+        columns = np.zeros((n_rows, n_slots), dtype=np.int64)
+        filled = np.ones((n_rows, n_slots), dtype=bool)
+
+        for position, column in enumerate(self.numeric_columns_):
+            values[:, position] = df[column].to_numpy()
+            columns[:, position] = position
+
+        for slot, (rows, encoded) in enumerate(self._encoded_positions(df), start=n_numeric):
+            filled[:, slot] = False
+            filled[rows, slot] = True
+            columns[rows, slot] = n_numeric + encoded
+
+        indptr = np.concatenate([[0], np.cumsum(filled.sum(axis=1))])
+        return sparse.csr_matrix((values[filled], columns[filled], indptr),
+                                 shape=(n_rows, len(self.feature_names_out_)))
@@ -0,0 +1,204 @@
+"""
+Recursive feature elimination with cross validation, without the refits.
+
+RFECV refits the estimator from scratch at every elimination step of every
+fold, one fold after the other. FastRFECV runs the same elimination (the same
+folds, step, ranking by coef_ or feature_importances_ and scoring with
+estimator.score) with the folds in worker processes, and avoids most of the
+work of each step:
+
+- LinearRegression is fitted once per fold from the centred Gram matrix
+  X'X. Dropping a feature removes its row and column from the cached inverse
+  (a rank one Schur complement update), so each step costs O(p^2) instead of
+  a fresh least squares solve. Rank deficient folds fall back to refitting.
+- LogisticRegression warm-starts each step from the coefficients of the
+  previous step, minus the dropped features, so lbfgs converges in a few
+  iterations. Warm starts move the solution only within the solver tolerance.
+- Any other estimator is refitted at every step, as in RFECV, but the folds
+  still run in parallel.
+
+n_features_, support_, ranking_ and cv_results_ follow RFECV.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone, is_classifier
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.model_selection import check_cv
+
+from ml_toolkit.parallel import map_tasks
+
+
+# Above this condition number the Gram matrix is not inverted
+MAX_GRAM_CONDITION = 1e10
+
+
+class FastRFECV:
+    """
+    Drop-in for RFECV(estimator, step, min_features_to_select, cv).
+
+    n_jobs is the number of worker processes the folds run in (see
+    ml_toolkit.parallel).
+    """
+
+    def __init__(self, estimator, step=1, min_features_to_select=1, cv=None, n_jobs=1):
+        self.estimator = estimator
+        self.step = step
+        self.min_features_to_select = min_features_to_select
+        self.cv = cv
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y):
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y)
+        n_features = X.shape[1]
+        self.n_features_in_ = n_features
+
+        step = int(max(1, self.step * n_features)) if 0 < self.step < 1 else int(self.step)
+        if step <= 0:
+            raise ValueError("step must be > 0")
+        min_features = min(self.min_features_to_select, n_features)
+
+        cv = check_cv(self.cv, y, classifier=is_classifier(self.estimator))
+        tasks = [(_eliminate, self.estimator, X[train], y[train], X[test], y[test], step, min_features)
+                 for train, test in cv.split(X, y)]
+        scores = np.array([fold_scores for fold_scores, _, _ in map_tasks(tasks, self.n_jobs)])
+
+        # As RFECV: the fewest features among the best mean scores
+        scores_sum = scores.sum(axis=0)
+        best_step = len(scores_sum) - np.argmax(scores_sum[::-1]) - 1
+        self.n_features_ = max(n_features - best_step * step, min_features)
+
+        _, self.support_, self.ranking_ = _eliminate(self.estimator, X, y, None, None, step, self.n_features_)
+        self.estimator_ = clone(self.estimator).fit(X[:, self.support_], y)
+
+        scores_by_count = scores[:, ::-1]
+        self.cv_results_ = {"mean_test_score": scores_by_count.mean(axis=0),
+                            "std_test_score": scores_by_count.std(axis=0)}
+        for fold, fold_scores in enumerate(scores_by_count):
+            self.cv_results_[f"split{fold}_test_score"] = fold_scores
+        self.cv_results_["n_features"] = np.append(np.arange(n_features, min_features, -step), min_features)[::-1]
+        return self
+
+    def get_support(self, indices=False):
+        return np.flatnonzero(self.support_) if indices else self.support_
+
+    def transform(self, X):
+        if isinstance(X, pd.DataFrame):
+            return X.loc[:, self.support_]
+        return np.asarray(X)[:, self.support_]
+
+    def predict(self, X):
+        return self.estimator_.predict(np.asarray(self.transform(X), dtype=float))
+
+    def score(self, X, y):
+        return self.estimator_.score(np.asarray(self.transform(X), dtype=float), y)
+
+
+def _eliminate(estimator, X_train, y_train, X_test, y_test, step, n_features_to_select):
+    """
+    Eliminate features down to n_features_to_select, scoring every step on
+    the test rows when given. Returns (scores, support, ranking).
+    """
+    if type(estimator) is LinearRegression and not estimator.positive:
+        result = _eliminate_least_squares(estimator.fit_intercept, X_train, y_train, X_test, y_test, step,
+                                          n_features_to_select)
+        if result is not None:
+            return result
+    return _eliminate_refitting(estimator, X_train, y_train, X_test, y_test, step, n_features_to_select)
+
+
+def _eliminate_refitting(estimator, X_train, y_train, X_test, y_test, step, n_features_to_select):
+    warm_start = isinstance(estimator, LogisticRegression)
+    n_features = X_train.shape[1]
+    support = np.ones(n_features, dtype=bool)
+    ranking = np.ones(n_features, dtype=np.int64)
+    scores = []
+    previous = None
+
+    while True:
+        features = np.flatnonzero(support)
+        model = clone(estimator)
+        if warm_start and previous is not None:
+            coef, intercept = previous
+            model.set_params(warm_start=True)
+            model.coef_ = coef
+            model.intercept_ = intercept
+        model.fit(X_train[:, features], y_train)
+        if X_test is not None:
+            scores.append(model.score(X_test[:, features], y_test))
+        if len(features) <= n_features_to_select:
+            return scores, support, ranking
+
+        order = np.argsort(_importances(model))
+        n_drop = min(step, len(features) - n_features_to_select)
+        support[features[order[:n_drop]]] = False
+        ranking[~support] += 1
+        if warm_start:
+            kept = np.sort(order[n_drop:])
+            previous = model.coef_[:, kept], model.intercept_
+
+
+def _eliminate_least_squares(fit_intercept, X_train, y_train, X_test, y_test, step, n_features_to_select):
+    # LinearRegression from the inverse of the centred Gram matrix, which is
+    # downdated as features are dropped; None when the fold is rank deficient
+    y_train = y_train.astype(float)
+    if fit_intercept:
+        x_mean = X_train.mean(axis=0)
+        y_mean = y_train.mean()
+    else:
+        x_mean = np.zeros(X_train.shape[1])
+        y_mean = 0.0
+    X_centred = X_train - x_mean
+    gram = X_centred.T @ X_centred
+    moments = X_centred.T @ (y_train - y_mean)
+    if np.linalg.cond(gram) > MAX_GRAM_CONDITION:
+        return None
+    inverse = np.linalg.inv(gram)
+
+    n_features = X_train.shape[1]
+    support = np.ones(n_features, dtype=bool)
+    ranking = np.ones(n_features, dtype=np.int64)
+    scores = []
+
+    while True:
+        features = np.flatnonzero(support)
+        coef = inverse @ moments[features]
+        if X_test is not None:
+            intercept = y_mean - x_mean[features] @ coef
+            scores.append(_r2_score(y_test, X_test[:, features] @ coef + intercept))
+        if len(features) <= n_features_to_select:
+            return scores, support, ranking
+
+        order = np.argsort(coef ** 2)
+        n_drop = min(step, len(features) - n_features_to_select)
+        # Highest position first, so the remaining positions stay valid
+        for position in np.sort(order[:n_drop])[::-1]:
+            inverse = _drop_from_inverse(inverse, position)
+        support[features[order[:n_drop]]] = False
+        ranking[~support] += 1
+
+
+def _drop_from_inverse(inverse, position):
+    # Inverse of the Gram matrix without one feature, from the inverse with it
+    keep = np.arange(len(inverse)) != position
+    column = inverse[keep, position]
+    return inverse[np.ix_(keep, keep)] - np.outer(column, column) / inverse[position, position]
+
+
+def _importances(model):
+    # As RFE: squared coefficients (summed over classes), else feature_importances_
+    if hasattr(model, "coef_"):
+        coef = np.asarray(model.coef_)
+        return coef ** 2 if coef.ndim == 1 else (coef ** 2).sum(axis=0)
+    return model.feature_importances_
+
+
+def _r2_score(y_true, y_pred):
+    residual = ((y_true - y_pred) ** 2).sum()
+    total = ((y_true - y_true.mean()) ** 2).sum()
+    if total == 0:
+        return 1.0 if residual == 0 else 0.0
+    return 1 - residual / total
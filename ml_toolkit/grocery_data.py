@@ -0,0 +1,94 @@
+"""
+Cached access to the sheets of the ABC Grocery workbook.
+
+Parsing data/grocery_database.xlsx with openpyxl dominates the run time of the
+scripts that read it. The first call parses every sheet once and writes each
+one to a column store under data/cache/grocery_database/; later calls memory
+map the cached columns instead. The cache is rebuilt when the workbook changes,
+which is detected from its size and mtime and confirmed with a sha256 of the
+file so that a plain touch or copy does not force a rebuild.
+
+To warm the cache up front, run from the Model Building folder:
+
+    PYTHONPATH=.. python -m ml_toolkit.grocery_data
+"""
+
+import hashlib
+import os
+
+import pandas as pd
+
+from ml_toolkit import column_store
+
+
+WORKBOOK_PATH = os.path.join("data", "grocery_database.xlsx")
+CACHE_DIR = os.path.join("data", "cache", "grocery_database")
+SHEET_NAMES = ["transactions", "customer_details", "loyalty_scores", "product_areas", "campaign_data"]
+
+
+def load_sheet(sheet_name, columns=None, workbook_path=WORKBOOK_PATH, cache_dir=CACHE_DIR):
+    """
+    Return one sheet of the workbook as a DataFrame, read through the cache.
+
+    columns limits the load to the listed columns. The result matches
+    pd.read_excel(workbook_path, sheet_name=sheet_name).
+    """
+    return column_store.read_table(sheet_path(sheet_name, workbook_path, cache_dir), columns=columns)
+
+
+def sheet_path(sheet_name, workbook_path=WORKBOOK_PATH, cache_dir=CACHE_DIR):
+    """Return the column store directory of one sheet, refreshing the cache if needed."""
+    table_path = os.path.join(cache_dir, sheet_name)
+    if not _is_fresh(workbook_path, table_path):
+        build_cache(workbook_path, cache_dir)
+    if not os.path.exists(table_path):
+        raise KeyError(f"Worksheet named {sheet_name!r} not found in {workbook_path}")
+    return table_path
+
+
+def build_cache(workbook_path=WORKBOOK_PATH, cache_dir=CACHE_DIR):
+    """Parse every sheet of the workbook once and (re)write its cached tables."""
+    source = _source_fingerprint(workbook_path)
+    source["sha256"] = _file_sha256(workbook_path)
+
+    sheets = pd.read_excel(workbook_path, sheet_name=None)
+    os.makedirs(cache_dir, exist_ok=True)
+    for sheet_name, sheet in sheets.items():
+        column_store.write_table(sheet, os.path.join(cache_dir, sheet_name), metadata={"source": source})
+
+
+def _is_fresh(workbook_path, table_path):
+
+    if not os.path.exists(os.path.join(table_path, column_store.SCHEMA_FILE)):
+        return False
+
+    cached = column_store.read_schema(table_path)["metadata"].get("source", {})
+    current = _source_fingerprint(workbook_path)
+    if cached.get("mtime_ns") == current["mtime_ns"] and cached.get("size") == current["size"]:
+        return True
+
+    # mtime or size moved: only the content hash decides
+    current["sha256"] = _file_sha256(workbook_path)
+    if cached.get("sha256") != current["sha256"]:
+        return False
+    column_store.update_metadata(table_path, {"source": current})
+    return True
+
+
+def _source_fingerprint(workbook_path):
+    stat = os.stat(workbook_path)
+    return {"path": os.path.abspath(workbook_path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as source_file:
+        for block in iter(lambda: source_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    build_cache()
+    for sheet_name in SHEET_NAMES:
+        print(f"{sheet_name}: {len(load_sheet(sheet_name))} rows cached")
@@ -0,0 +1,262 @@
+"""
+Decision trees grown on pre-binned features.
+
+The exact splitter of DecisionTreeRegressor / DecisionTreeClassifier sorts
+the values of every feature again at every node. Here FeatureBinner cuts each
+feature once into at most 256 quantile bins, stored as a uint8 matrix, and
+the trees only ever look at the bin codes: a node's split is found from per
+feature histograms of its row count and target statistics (the target sum
+for regression, class counts for classification), cumulated over the bins.
+Only the smaller child's histograms are built; the larger child's are the
+parent's minus the smaller's. A fitted binner (and its binned matrix) can be
+shared by many trees, and predict_at_depths gives the predictions of the tree
+cut at every depth from one traversal.
+
+Splits are on bin boundaries, so the trees approximate the exact ones; with
+at most 256 distinct values per feature they choose among the same
+thresholds. The split criteria are squared error and gini, with max_depth and
+min_samples_leaf as in scikit-learn.
+"""
+
+import numpy as np
+from sklearn.metrics import accuracy_score, r2_score
+
+
+MAX_BINS = 256
+
+
+class FeatureBinner:
+    """
+    Quantile bins of every feature, fitted on at most subsample rows.
+
+    Features with no more than max_bins distinct values get one bin per
+    value. Missing values go to the highest bin.
+    """
+
+    def __init__(self, max_bins=MAX_BINS, subsample=200_000, random_state=0):
+        if not 2 <= max_bins <= MAX_BINS:
+            raise ValueError(f"max_bins must be between 2 and {MAX_BINS}, got {max_bins}")
+        self.max_bins = max_bins
+        self.subsample = subsample
+        self.random_state = random_state
+
+    def fit(self, X):
+        X = np.asarray(X, dtype=float)
+        if self.subsample is not None and len(X) > self.subsample:
+            rng = np.random.default_rng(self.random_state)
+            X = X[rng.choice(len(X), self.subsample, replace=False)]
+
+        # A value v falls in bin searchsorted(edges, v, side="right"), so the
+        # edges_ of a feature are the lower bounds of its bins 1, 2, ...
+        self.bin_edges_ = []
+        for values in X.T:
+            distinct = np.unique(values[~np.isnan(values)])
+            if len(distinct) <= self.max_bins:
+                edges = (distinct[:-1] + distinct[1:]) / 2
+            else:
+                edges = np.unique(np.quantile(values[~np.isnan(values)], np.linspace(0, 1, self.max_bins + 1)[1:-1]))
+            self.bin_edges_.append(edges)
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def transform(self, X):
+        """uint8 bin codes of X, column-major."""
+        X = np.asarray(X, dtype=float)
+        binned = np.empty(X.shape, dtype=np.uint8, order="F")
+        for feature, edges in enumerate(self.bin_edges_):
+            codes = np.searchsorted(edges, X[:, feature], side="right")
+            codes[np.isnan(X[:, feature])] = self.max_bins - 1
+            binned[:, feature] = codes
+        return binned
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+
+class _HistogramTree:
+
+    def __init__(self, max_depth=None, min_samples_leaf=1, max_bins=MAX_BINS, binner=None):
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.max_bins = max_bins
+        self.binner = binner
+
+    def fit(self, X, y, binned=None):
+        """
+        Grow the tree. X is binned with binner (fitted here unless it was
+        given fitted); pass binned to reuse X's bin codes from an earlier fit.
+        """
+        if self.binner is None:
+            self.binner_ = FeatureBinner(self.max_bins).fit(X)
+        else:
+            self.binner_ = self.binner if hasattr(self.binner, "bin_edges_") else self.binner.fit(X)
+        if binned is None:
+            binned = self.binner_.transform(X)
+        self._build(binned, *self._target_codes(y))
+        return self
+
+    def predict_at_depths(self, X, depths):
+        """Array with the predictions for X of the tree cut at each of depths, one row per depth."""
+        nodes = self._nodes_by_depth(self.binner_.transform(X), max(depths))
+        return np.vstack([self._node_predictions(nodes[min(depth, len(nodes) - 1)]) for depth in depths])
+
+    def score_at_depths(self, X, y, depths, metric=None):
+        """List of metric(y, predictions) of the tree cut at each of depths."""
+        metric = metric or self._default_metric
+        return [metric(y, prediction) for prediction in self.predict_at_depths(X, depths)]
+
+    def predict(self, X):
+        return self._node_predictions(self._nodes_by_depth(self.binner_.transform(X))[-1])
+
+    def score(self, X, y):
+        return self._default_metric(y, self.predict(X))
+
+    def get_depth(self):
+        return int(self.node_depth_.max())
+
+    def get_n_leaves(self):
+        return int(np.sum(self.feature_ < 0))
+
+    def _build(self, binned, targets, n_stats):
+        # targets are float values (n_stats=1) or int class codes (n_stats classes)
+        n_bins = self.binner_.max_bins
+        min_samples_leaf = self.min_samples_leaf
+        max_depth = np.inf if self.max_depth is None else self.max_depth
+        columns = [binned[:, feature] for feature in range(binned.shape[1])]
+
+        features, thresholds, lefts, rights, values, depths = [], [], [], [], [], []
+
+        def add_node(count, sums, depth):
+            features.append(-1)
+            thresholds.append(0)
+            lefts.append(-1)
+            rights.append(-1)
+            values.append(sums / count)
+            depths.append(depth)
+            return len(features) - 1
+
+        def can_split(rows, depth):
+            return (depth < max_depth and len(rows) >= max(2, 2 * min_samples_leaf)
+                    and np.ptp(targets[rows]) > 0)
+
+        root_rows = np.arange(len(targets))
+        root_counts, root_sums = _histograms(columns, targets, root_rows, n_bins, n_stats)
+        root = add_node(len(root_rows), root_sums[0].sum(axis=0), 0)
+        stack = [(root, root_rows, root_counts, root_sums)] if can_split(root_rows, 0) else []
+
+        while stack:
+            node, rows, counts, sums = stack.pop()
+            split = _best_split(counts, sums, min_samples_leaf)
+            if split is None:
+                continue
+            feature, threshold, left_count, left_sums = split
+            total_sums = sums[0].sum(axis=0)
+            depth = depths[node] + 1
+
+            goes_left = columns[feature][rows] <= threshold
+            children = [(rows[goes_left], left_count, left_sums),
+                        (rows[~goes_left], len(rows) - left_count, total_sums - left_sums)]
+            child_nodes = [add_node(count, child_sums, depth) for _, count, child_sums in children]
+            features[node], thresholds[node] = feature, threshold
+            lefts[node], rights[node] = child_nodes
+
+            splittable = [can_split(child_rows, depth) for child_rows, _, _ in children]
+            if not any(splittable):
+                continue
+            # Histograms of the smaller child; the larger one's by subtraction
+            small = 0 if len(children[0][0]) <= len(children[1][0]) else 1
+            small_counts, small_sums = _histograms(columns, targets, children[small][0], n_bins, n_stats)
+            histograms = {small: (small_counts, small_sums), 1 - small: (counts - small_counts, sums - small_sums)}
+            for child in (1, 0):
+                if splittable[child]:
+                    stack.append((child_nodes[child], children[child][0], *histograms[child]))
+
+        self.feature_ = np.array(features, dtype=np.intp)
+        self.threshold_ = np.array(thresholds, dtype=np.uint8)
+        self.children_left_ = np.array(lefts, dtype=np.intp)
+        self.children_right_ = np.array(rights, dtype=np.intp)
+        self.value_ = np.array(values)
+        self.node_depth_ = np.array(depths, dtype=np.intp)
+
+    def _nodes_by_depth(self, binned, max_depth=None):
+        # Node of every row after 0, 1, ... levels, until all rows are in leaves (or max_depth)
+        node = np.zeros(len(binned), dtype=np.intp)
+        nodes = [node.copy()]
+        active = np.flatnonzero(self.feature_[node] >= 0)
+        while len(active) and (max_depth is None or len(nodes) <= max_depth):
+            current = node[active]
+            goes_left = binned[active, self.feature_[current]] <= self.threshold_[current]
+            node[active] = np.where(goes_left, self.children_left_[current], self.children_right_[current])
+            active = active[self.feature_[node[active]] >= 0]
+            nodes.append(node.copy())
+        return nodes
+
+
+class HistogramTreeRegressor(_HistogramTree):
+    """Regression tree (squared error) grown on binned features."""
+
+    _default_metric = staticmethod(r2_score)
+
+    def _target_codes(self, y):
+        y = np.asarray(y, dtype=float).ravel()
+        # Centring keeps the sums small; the offset is added back to the leaf values
+        self._offset = y.mean()
+        return y - self._offset, 1
+
+    def _node_predictions(self, nodes):
+        return self.value_[nodes, 0] + self._offset
+
+
+class HistogramTreeClassifier(_HistogramTree):
+    """Classification tree (gini) grown on binned features."""
+
+    _default_metric = staticmethod(accuracy_score)
+
+    def _target_codes(self, y):
+        self.classes_, codes = np.unique(np.asarray(y).ravel(), return_inverse=True)
+        return codes.ravel(), len(self.classes_)
+
+    def predict_proba(self, X):
+        return self.value_[self._nodes_by_depth(self.binner_.transform(X))[-1]]
+
+    def _node_predictions(self, nodes):
+        return self.classes_[np.argmax(self.value_[nodes], axis=1)]
+
+
+def _histograms(columns, targets, rows, n_bins, n_stats):
+    # Per feature row counts (features x bins) and target sums (features x bins x stats)
+    node_targets = targets[rows]
+    counts = np.empty((len(columns), n_bins))
+    sums = np.empty((len(columns), n_bins, n_stats))
+    for feature, column in enumerate(columns):
+        bins = column[rows]
+        counts[feature] = np.bincount(bins, minlength=n_bins)
+        if np.issubdtype(node_targets.dtype, np.integer):
+            # Class counts per bin in one pass
+            sums[feature] = np.bincount(bins.astype(np.intp) * n_stats + node_targets,
+                                        minlength=n_bins * n_stats).reshape(n_bins, n_stats)
+        else:
+            sums[feature, :, 0] = np.bincount(bins, weights=node_targets, minlength=n_bins)
+    return counts, sums
+
+
+def _best_split(counts, sums, min_samples_leaf):
+    # Squared error and gini both pick the split maximising
+    # sum(left_sums^2) / left_count + sum(right_sums^2) / right_count
+    total_count = counts[0].sum()
+    total_sums = sums[0].sum(axis=0)
+    left_counts = np.cumsum(counts, axis=1)[:, :-1]
+    left_sums = np.cumsum(sums, axis=1)[:, :-1]
+    right_counts = total_count - left_counts
+    right_sums = total_sums - left_sums
+
+    valid = (left_counts >= min_samples_leaf) & (right_counts >= min_samples_leaf)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = (left_sums ** 2).sum(axis=2) / left_counts + (right_sums ** 2).sum(axis=2) / right_counts
+    score[~valid] = -np.inf
+
+    feature, threshold = np.unravel_index(np.argmax(score), score.shape)
+    parent_score = (total_sums ** 2).sum() / total_count
+    if not valid[feature, threshold] or score[feature, threshold] <= parent_score * (1 + 1e-12):
+        return None
+    return feature, threshold, left_counts[feature, threshold], left_sums[feature, threshold]
@@ -0,0 +1,116 @@
+"""
+Incremental refresh of the customer level sales summary.
+
+The running per customer aggregates (see ml_toolkit.customer_aggregation) are
+persisted in a state directory together with a watermark: the number of
+transaction rows already folded in and the values of the last of those rows.
+A refresh only aggregates the rows appended after the watermark and merges
+them into the stored state, so its cost scales with the size of the delta
+rather than with the full history.
+
+The transaction log is treated as append-only. If the row under the watermark
+no longer matches, or the log got shorter, the state is rebuilt from scratch.
+"""
+
+import os
+import shutil
+
+import numpy as np
+
+from ml_toolkit import column_store
+from ml_toolkit.customer_aggregation import TRANSACTION_COLUMNS, aggregate_partials, empty_partial, \
+    finalise_partial, merge_partials, read_table_slice
+
+
+STATE_DIR = os.path.join("data", "cache", "customer_aggregates")
+
+
+def refresh_sales_summary(source, state_dir=STATE_DIR, chunk_size=1_000_000, n_jobs=1, full=False):
+    """
+    Fold the transactions added to source since the last refresh into the
+    stored aggregates and return the customer level sales summary.
+
+    source is a DataFrame or a column store table directory. full=True
+    ignores the stored state and aggregates the whole log again.
+    """
+    n_rows = _source_length(source)
+
+    state = None if full else load_state(state_dir)
+    if state is not None and not _watermark_matches(source, n_rows, state["watermark"]):
+        state = None
+
+    start_row = 0 if state is None else state["watermark"]["rows_processed"]
+    partial = None if state is None else state["partial"]
+
+    if start_row < n_rows:
+        partial = merge_partials(partial, aggregate_partials(source, chunk_size, n_jobs, start_row=start_row))
+    if partial is None:
+        partial = empty_partial()
+
+    save_state(state_dir, partial, _watermark(source, n_rows))
+    return finalise_partial(partial)
+
+
+def load_state(state_dir=STATE_DIR):
+    """Return the stored {"partial", "watermark"} state, or None if there is none."""
+    totals_path = os.path.join(state_dir, "totals")
+    if not os.path.exists(os.path.join(totals_path, column_store.SCHEMA_FILE)):
+        return None
+    totals = column_store.read_table(totals_path, mmap_mode=None)
+    areas = column_store.read_table(os.path.join(state_dir, "areas"), mmap_mode=None)
+    watermark = column_store.read_schema(totals_path)["metadata"]["watermark"]
+    return {"partial": (totals, areas), "watermark": watermark}
+
+
+def save_state(state_dir, partial, watermark):
+    """Replace the stored state with partial and its watermark."""
+    tmp_dir = f"{state_dir}.tmp{os.getpid()}"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    totals, areas = partial
+    column_store.write_table(totals, os.path.join(tmp_dir, "totals"), metadata={"watermark": watermark})
+    column_store.write_table(areas.reset_index(drop=True), os.path.join(tmp_dir, "areas"))
+
+    old_dir = f"{state_dir}.old{os.getpid()}"
+    if os.path.exists(state_dir):
+        os.rename(state_dir, old_dir)
+    os.rename(tmp_dir, state_dir)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+
+
+def _source_length(source):
+    if isinstance(source, str):
+        return column_store.read_schema(source)["n_rows"]
+    return len(source)
+
+
+def _last_row(source, n_rows):
+    if n_rows == 0:
+        return None
+    if isinstance(source, str):
+        row = read_table_slice(source, n_rows - 1, n_rows)
+    else:
+        row = source[TRANSACTION_COLUMNS].iloc[n_rows - 1:n_rows]
+    return [_json_value(value) for value in row.iloc[0]]
+
+
+def _watermark(source, n_rows):
+    return {"rows_processed": n_rows, "last_row": _last_row(source, n_rows)}
+
+
+def _watermark_matches(source, n_rows, watermark):
+    rows_processed = watermark["rows_processed"]
+    if rows_processed > n_rows:
+        return False
+    return _last_row(source, rows_processed) == watermark["last_row"]
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
@@ -0,0 +1,233 @@
+"""
+KNN imputation with neighbour indexes and memory-bounded blocks.
+
+KNNImputer computes the full nan-euclidean distance matrix between the rows to
+impute and every donor row, which is quadratic in time and memory.
+
+IndexedKNNImputer groups donor rows by their missing-column pattern and rows
+to impute (receivers) by theirs. Between a receiver pattern and a donor
+pattern the nan-euclidean distance is the plain euclidean distance on the
+columns both observe, times a constant, so a KD-tree (or ball tree) over the
+donor group restricted to those columns finds the nearest donors of the
+group. The complete rows form one such group. Donor groups too small to be
+worth a tree are scored by brute force in blocks. Receivers are processed in
+blocks of block_size rows across a thread pool, so memory is bounded by the
+block size rather than by rows x donors.
+
+Donors at the same distance, up to rounding, are taken in row order: each
+tree is queried for twice n_neighbors donors, and again for more while its
+farthest answer is still within rounding of its n_neighbors-th, so every
+donor tied with the nearest ones is a candidate, and the candidates tied at
+the n_neighbors-th distance are filled in by lowest row. With distance
+weights, donors within rounding of zero count as exact matches.
+
+KNNImputer instead ranks donors on distances computed through row norms,
+whose rounding decides between donors that are tied in exact arithmetic, and
+takes the ones np.argpartition leaves in front, which does not follow row
+order. Without ties the neighbours and imputed values are the same (up to
+rounding); where several donors tie at the n_neighbors-th distance (common
+when values lie on a coarse grid) either choice is a set of nearest
+neighbours, but the imputed values can differ from KNNImputer's.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import nan_euclidean_distances
+from sklearn.neighbors import BallTree, KDTree
+
+
+KD_TREE_MAX_DIMENSIONS = 20
+# Squared distances closer than TIE_TOLERANCE times the squared row norms are ties
+TIE_TOLERANCE = 1e-12
+
+
+class IndexedKNNImputer:
+    """
+    Drop-in for KNNImputer(n_neighbors, weights) on numeric data.
+
+    Rows with no observed values, and rows without any donor, get the column
+    mean of the fitted data. Unlike KNNImputer, columns that were entirely
+    missing in fit are kept (and stay missing) rather than dropped, and donors
+    tied at the n_neighbors-th distance are taken in row order (see the module
+    docstring). Donor groups with fewer than min_group_size rows are not
+    indexed.
+    """
+
+    def __init__(self, n_neighbors=5, weights="uniform", block_size=2048, n_jobs=None, leaf_size=40,
+                 min_group_size=64):
+        if weights not in ("uniform", "distance"):
+            raise ValueError(f"weights must be 'uniform' or 'distance', got {weights!r}")
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.block_size = block_size
+        self.n_jobs = n_jobs
+        self.leaf_size = leaf_size
+        self.min_group_size = min_group_size
+
+    def fit(self, X):
+        X = np.asarray(X, dtype=float)
+        missing = np.isnan(X)
+
+        self.n_features_in_ = X.shape[1]
+        self.column_means_ = np.ma.array(X, mask=missing).mean(axis=0).filled(np.nan)
+        self._fit_X = X
+        self._squared_norm_scale = np.nanmax(np.nansum(X ** 2, axis=1), initial=0.0)
+
+        donor_rows = np.flatnonzero(~missing.all(axis=1))
+        patterns, pattern_ids = np.unique(missing[donor_rows], axis=0, return_inverse=True)
+        pattern_ids = pattern_ids.ravel()
+
+        # Donors are kept as rows of the fitted X, in row order (the tie break)
+        self._donor_groups = []
+        brute_force = []
+        for pattern_id, pattern in enumerate(patterns):
+            group_rows = donor_rows[pattern_ids == pattern_id]
+            if len(group_rows) >= self.min_group_size:
+                self._donor_groups.append((pattern, group_rows))
+            else:
+                brute_force.append(group_rows)
+
+        self._brute_force_rows = np.sort(np.concatenate(brute_force)) if brute_force else np.empty(0, dtype=np.intp)
+        self._brute_force_present = ~missing[self._brute_force_rows]
+        self._trees = {}
+        return self
+
+    def transform(self, X):
+        """Return X (array or DataFrame) with its missing values imputed."""
+        values = np.array(X, dtype=float)
+        missing = np.isnan(values)
+        receivers = np.flatnonzero(missing.any(axis=1))
+
+        if len(receivers):
+            patterns, pattern_ids = np.unique(missing[receivers], axis=0, return_inverse=True)
+            pattern_ids = pattern_ids.ravel()
+            # Trees are built up front so worker threads only ever read them
+            group_trees = [self._group_trees(pattern) for pattern in patterns]
+
+            with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+                futures = []
+                for pattern_id, pattern in enumerate(patterns):
+                    rows = receivers[pattern_ids == pattern_id]
+                    for start in range(0, len(rows), self.block_size):
+                        futures.append(executor.submit(self._impute_block, values, rows[start:start + self.block_size],
+                                                       pattern, group_trees[pattern_id]))
+                for future in futures:
+                    future.result()
+
+        if isinstance(X, pd.DataFrame):
+            return pd.DataFrame(values, index=X.index, columns=X.columns)
+        return values
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+    def _group_trees(self, receiver_pattern):
+        # (donor group, shared columns, tree) for every group sharing a column with the pattern
+        group_trees = []
+        for group_index, (donor_pattern, group_rows) in enumerate(self._donor_groups):
+            shared = ~receiver_pattern & ~donor_pattern
+            if not shared.any():
+                continue
+            key = (group_index, shared.tobytes())
+            if key not in self._trees:
+                tree_class = KDTree if shared.sum() <= KD_TREE_MAX_DIMENSIONS else BallTree
+                self._trees[key] = tree_class(self._fit_X[np.ix_(group_rows, shared)], leaf_size=self.leaf_size)
+            group_trees.append((group_index, shared, self._trees[key]))
+        return group_trees
+
+    def _impute_block(self, values, rows, pattern, group_trees):
+        # Impute values[rows] in place; every row shares the missing pattern
+        missing_columns = np.flatnonzero(pattern)
+        block = values[rows]
+
+        if pattern.all():
+            values[np.ix_(rows, missing_columns)] = self.column_means_[missing_columns]
+            return
+
+        # (distances, donor rows) candidates for every missing column
+        candidates = {column: ([], []) for column in missing_columns}
+
+        for group_index, shared, tree in group_trees:
+            donor_pattern, group_rows = self._donor_groups[group_index]
+            distances, positions = self._query_candidates(tree, block[:, shared], len(group_rows))
+            distances *= np.sqrt(self.n_features_in_ / shared.sum())
+            donors = group_rows[positions]
+            for column in missing_columns:
+                if not donor_pattern[column]:
+                    candidates[column][0].append(distances)
+                    candidates[column][1].append(donors)
+
+        for start in range(0, len(self._brute_force_rows), self.block_size):
+            donor_rows = self._brute_force_rows[start:start + self.block_size]
+            present = self._brute_force_present[start:start + self.block_size]
+            distances = nan_euclidean_distances(block, self._fit_X[donor_rows])
+            for column in missing_columns:
+                has_column = present[:, column]
+                column_rows = np.broadcast_to(donor_rows[has_column], (len(rows), has_column.sum()))
+                nearest = self._nearest(distances[:, has_column], column_rows)
+                candidates[column][0].append(nearest[0])
+                candidates[column][1].append(nearest[1])
+
+        for column, (distances, donors) in candidates.items():
+            if distances:
+                distances, donors = self._nearest(np.hstack(distances), np.hstack(donors))
+            else:
+                distances = np.empty((len(rows), 0))
+                donors = np.empty((len(rows), 0), dtype=np.intp)
+            values[rows, column] = self._weighted_mean(distances, self._fit_X[donors, column], column)
+
+    def _query_candidates(self, tree, points, group_size):
+        # Distances to and positions in the group of at least the n_neighbors nearest donors of
+        # every point, and of every donor within rounding of the n_neighbors-th
+        n_neighbors = min(self.n_neighbors, group_size)
+        k = min(2 * n_neighbors, group_size)
+        while True:
+            distances, positions = tree.query(points, k=k)
+            if k == group_size:
+                return distances, positions
+            kth = distances[:, n_neighbors - 1] ** 2
+            if not np.any(distances[:, -1] ** 2 - kth <= self._rounding(kth)):
+                return distances, positions
+            k = min(2 * k, group_size)
+
+    def _rounding(self, squared_distances):
+        # Squared distances within this of squared_distances are ties
+        return TIE_TOLERANCE * (squared_distances + self.n_features_in_ * self._squared_norm_scale)
+
+    def _nearest(self, distances, donors):
+        # Keep the n_neighbors closest candidates of every row, ties in donor row order;
+        # no overlap counts as infinitely far
+        distances = np.where(np.isfinite(distances), distances, np.inf)
+        donors = np.asarray(donors)
+        if distances.shape[1] <= self.n_neighbors:
+            return distances, donors
+        squared = distances ** 2
+        kth = np.partition(squared, self.n_neighbors - 1, axis=1)[:, self.n_neighbors - 1:self.n_neighbors]
+        with np.errstate(invalid="ignore"):
+            is_tied = np.abs(squared - kth) <= self._rounding(kth)
+            is_nearer = ~is_tied & (squared < kth)
+        # The candidates nearer than the n_neighbors-th, then the ones tied with it by row
+        rank = np.where(is_nearer, 0, np.where(is_tied, 1, 2))
+        nearest = np.lexsort((donors, rank), axis=1)[:, :self.n_neighbors]
+        return np.take_along_axis(distances, nearest, axis=1), np.take_along_axis(donors, nearest, axis=1)
+
+    def _weighted_mean(self, distances, donor_values, column):
+
+        is_donor = np.isfinite(distances)
+
+        if self.weights == "uniform":
+            weights = is_donor.astype(float)
+        else:
+            distances = np.where(distances ** 2 <= self._rounding(0.0), 0.0, distances)
+            with np.errstate(divide="ignore"):
+                weights = 1.0 / distances
+            # As in KNNImputer, exact matches take all the weight
+            has_exact_match = np.isinf(weights).any(axis=1)
+            weights[has_exact_match] = np.isinf(weights[has_exact_match])
+
+        total_weight = weights.sum(axis=1)
+        weighted_sum = np.where(weights > 0, weights * donor_values, 0.0).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(total_weight > 0, weighted_sum / total_weight, self.column_means_[column])
@@ -0,0 +1,187 @@
+"""
+Assessment metrics derived from one accumulated summary of the predictions.
+
+Calling confusion_matrix, accuracy_score, precision_score, recall_score and
+f1_score one after the other validates and rescans the labels five times.
+ClassificationMetrics counts the confusion matrix once, with np.bincount over
+integer codes of the (actual, predicted) pairs, and derives every metric from
+that matrix. RegressionMetrics keeps the count, mean and sums of squares
+needed for R-squared, adjusted R-squared and the error metrics.
+
+Both accumulate batch by batch with update, and the summaries of different
+batches or processes combine with merge, so monitoring jobs never hold all
+the labels in memory. The results match the scikit-learn functions on the
+same data (undefined ratios are 0, as with zero_division=0).
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Integer labels spanning at most this many values are counted without sorting
+MAX_DIRECT_LABEL_SPAN = 1024
+
+
+class ClassificationMetrics:
+    """
+    Confusion matrix over batches of (y_true, y_pred), and the accuracy,
+    precision, recall and f1 of the pos_label class derived from it.
+
+    confusion_matrix_ has the sorted labels seen so far (labels_) as rows
+    (actual) and columns (predicted), as confusion_matrix.
+    """
+
+    def __init__(self, pos_label=1):
+        self.pos_label = pos_label
+        self.labels_ = np.array([])
+        self.confusion_matrix_ = np.zeros((0, 0), dtype=np.int64)
+
+    def update(self, y_true, y_pred):
+        """Add a batch of actual and predicted labels."""
+        y_true = np.asarray(y_true).ravel()
+        y_pred = np.asarray(y_pred).ravel()
+        if len(y_true) != len(y_pred):
+            raise ValueError(f"y_true and y_pred have different lengths ({len(y_true)} and {len(y_pred)})")
+        labels, counts = _count_pairs(y_true, y_pred)
+        return self._add(labels, counts)
+
+    def merge(self, other):
+        """Add the counts of another ClassificationMetrics."""
+        return self._add(other.labels_, other.confusion_matrix_)
+
+    def accuracy(self):
+        return _ratio(np.trace(self.confusion_matrix_), self.confusion_matrix_.sum())
+
+    def precision(self):
+        tp, fp, _ = self._positive_counts()
+        return _ratio(tp, tp + fp)
+
+    def recall(self):
+        tp, _, fn = self._positive_counts()
+        return _ratio(tp, tp + fn)
+
+    def f1(self):
+        tp, fp, fn = self._positive_counts()
+        return _ratio(2 * tp, 2 * tp + fp + fn)
+
+    def summary(self):
+        """Series of accuracy, precision, recall and f1."""
+        return pd.Series({"accuracy": self.accuracy(), "precision": self.precision(),
+                          "recall": self.recall(), "f1": self.f1()})
+
+    def _positive_counts(self):
+        # (tp, fp, fn) of pos_label
+        matches = np.flatnonzero(self.labels_ == self.pos_label)
+        if not len(matches):
+            return 0, 0, 0
+        position = matches[0]
+        tp = self.confusion_matrix_[position, position]
+        return (tp, self.confusion_matrix_[:, position].sum() - tp,
+                self.confusion_matrix_[position, :].sum() - tp)
+
+    def _add(self, labels, counts):
+        if not len(self.labels_):
+            self.labels_ = labels
+            self.confusion_matrix_ = counts.astype(np.int64)
+            return self
+        all_labels = np.union1d(self.labels_, labels)
+        confusion = np.zeros((len(all_labels), len(all_labels)), dtype=np.int64)
+        for part_labels, part_counts in ((self.labels_, self.confusion_matrix_), (labels, counts)):
+            positions = np.searchsorted(all_labels, part_labels)
+            confusion[np.ix_(positions, positions)] += part_counts
+        self.labels_ = all_labels
+        self.confusion_matrix_ = confusion
+        return self
+
+
+class RegressionMetrics:
+    """
+    R-squared, adjusted R-squared, MSE, RMSE and MAE over batches of
+    (y_true, y_pred).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.total_sum_squares = 0.0
+        self.residual_sum_squares = 0.0
+        self.absolute_error_sum = 0.0
+
+    def update(self, y_true, y_pred):
+        """Add a batch of actual and predicted values."""
+        y_true = np.asarray(y_true, dtype=float).ravel()
+        residuals = y_true - np.asarray(y_pred, dtype=float).ravel()
+        batch = RegressionMetrics()
+        batch.count = len(y_true)
+        if batch.count:
+            batch.mean = y_true.mean()
+            batch.total_sum_squares = np.sum((y_true - batch.mean) ** 2)
+            batch.residual_sum_squares = residuals @ residuals
+            batch.absolute_error_sum = np.abs(residuals).sum()
+        return self.merge(batch)
+
+    def merge(self, other):
+        """Add the sums of another RegressionMetrics (Chan et al. update of the total sum of squares)."""
+        count = self.count + other.count
+        if count:
+            delta = other.mean - self.mean
+            self.total_sum_squares += other.total_sum_squares + delta ** 2 * self.count * other.count / count
+            self.mean += delta * other.count / count
+        self.count = count
+        self.residual_sum_squares += other.residual_sum_squares
+        self.absolute_error_sum += other.absolute_error_sum
+        return self
+
+    def r2(self):
+        # As r2_score: a constant target scores 1 when predicted exactly, else 0
+        if self.total_sum_squares == 0:
+            return 1.0 if self.residual_sum_squares == 0 else 0.0
+        return 1 - self.residual_sum_squares / self.total_sum_squares
+
+    def adjusted_r2(self, n_features):
+        """R-squared adjusted for a model with n_features input variables."""
+        return 1 - (1 - self.r2()) * (self.count - 1) / (self.count - n_features - 1)
+
+    def mse(self):
+        return _ratio(self.residual_sum_squares, self.count)
+
+    def rmse(self):
+        return np.sqrt(self.mse())
+
+    def mae(self):
+        return _ratio(self.absolute_error_sum, self.count)
+
+    def summary(self, n_features=None):
+        """Series of r2 (and adjusted_r2 when n_features is given), mse, rmse and mae."""
+        summary = {"r2": self.r2()}
+        if n_features is not None:
+            summary["adjusted_r2"] = self.adjusted_r2(n_features)
+        summary.update({"mse": self.mse(), "rmse": self.rmse(), "mae": self.mae()})
+        return pd.Series(summary)
+
+
+def _count_pairs(y_true, y_pred):
+    # (sorted labels present, confusion counts) of one batch
+    both = np.concatenate([y_true, y_pred])
+    if len(both) and (np.issubdtype(both.dtype, np.integer) or both.dtype == bool):
+        both = both.astype(np.int64)
+        lowest = both.min()
+        span = both.max() - lowest + 1
+        if span <= MAX_DIRECT_LABEL_SPAN:
+            codes = both - lowest
+            counts = np.bincount(codes[:len(y_true)] * span + codes[len(y_true):],
+                                 minlength=span * span).reshape(span, span)
+            present = np.flatnonzero(np.bincount(codes, minlength=span))
+            labels = (lowest + present).astype(y_true.dtype)
+            return labels, counts[np.ix_(present, present)]
+
+    labels, codes = np.unique(both, return_inverse=True)
+    codes = codes.ravel()
+    n_labels = len(labels)
+    counts = np.bincount(codes[:len(y_true)] * n_labels + codes[len(y_true):],
+                         minlength=n_labels * n_labels).reshape(n_labels, n_labels)
+    return labels, counts
+
+
+def _ratio(numerator, denominator):
+    return float(numerator / denominator) if denominator else 0.0
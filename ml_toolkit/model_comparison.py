@@ -0,0 +1,150 @@
+"""
+Cross validate several models against the same per-fold preprocessing.
+
+Putting the ColumnTransformer of 302_Pipelines.py in a Pipeline with each
+model and calling cross_val_score refits the imputers, encoder and scaler for
+every model in every fold, and pickles the data to every worker.
+compare_models fits the preprocessor once per fold, keeps the fitted
+preprocessor and its transformed train/test matrices in a FoldCache (keyed by
+the fold's rows, the preprocessor's parameters and the data), and then scores
+every model on every fold. With n_jobs != 1 the transformed matrices are
+placed in shared memory once and the worker processes map them, so only the
+model and the names of the blocks are sent to each task.
+
+Scores equal those of cross_val_score(Pipeline([preprocessor, model]), ...),
+since each model sees the same preprocessor fitted on the same training rows.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import clone, is_classifier
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import check_cv
+
+
+class FoldCache:
+    """
+    Fitted preprocessors and transformed fold matrices, reused across calls
+    to compare_models with the same data, folds and preprocessor parameters.
+    """
+
+    def __init__(self):
+        self._folds = {}
+
+    def __len__(self):
+        return len(self._folds)
+
+    def fold(self, preprocessor, X, y, train, test, data_key=None):
+        """(fitted preprocessor, X_train, X_test, y_train, y_test) of one fold, fitted on first use."""
+        if data_key is None:
+            data_key = joblib.hash((X, y))
+        key = (joblib.hash(preprocessor.get_params(deep=True)), data_key, joblib.hash((train, test)))
+        if key not in self._folds:
+            X_train, X_test = _take_rows(X, train), _take_rows(X, test)
+            y = np.asarray(y)
+            fitted = clone(preprocessor).fit(X_train, y[train])
+            self._folds[key] = (fitted, fitted.transform(X_train), fitted.transform(X_test), y[train], y[test])
+        return self._folds[key]
+
+    def clear(self):
+        self._folds.clear()
+
+
+def compare_models(preprocessor, models, X, y, cv=5, scoring=None, n_jobs=1, cache=None):
+    """
+    Score every model of the dict models (name: estimator) on every fold.
+
+    cv and scoring are as in cross_val_score. n_jobs is the number of worker
+    processes (see ml_toolkit.parallel). Returns a DataFrame with one row per
+    model: the score of each fold, mean_score and std_score.
+    """
+    if cache is None:
+        cache = FoldCache()
+    cv = check_cv(cv, y, classifier=any(is_classifier(model) for model in models.values()))
+    data_key = joblib.hash((X, y))
+    folds = [cache.fold(preprocessor, X, y, train, test, data_key) for train, test in cv.split(X, y)]
+
+    tasks = [(name, fold) for name in models for fold in range(len(folds))]
+    if n_jobs == 1:
+        scores = [_score_fold(models[name], scoring, *folds[fold][1:]) for name, fold in tasks]
+    else:
+        scores = _score_in_pool(models, scoring, folds, tasks, n_jobs)
+
+    fold_scores = pd.DataFrame(np.reshape(scores, (len(models), len(folds))), index=list(models),
+                               columns=[f"fold_{fold}" for fold in range(len(folds))])
+    fold_scores["mean_score"] = fold_scores.iloc[:, :len(folds)].mean(axis=1)
+    fold_scores["std_score"] = fold_scores.iloc[:, :len(folds)].std(axis=1, ddof=0)
+    return fold_scores
+
+
+def _score_fold(model, scoring, X_train, X_test, y_train, y_test):
+    model = clone(model).fit(X_train, y_train)
+    return check_scoring(model, scoring=scoring)(model, X_test, y_test)
+
+
+def _score_in_pool(models, scoring, folds, tasks, n_jobs):
+    blocks = []
+    try:
+        shared_folds = [[_share(array, blocks) for array in fold[1:]] for fold in folds]
+        n_workers = n_jobs if n_jobs and n_jobs > 0 else os.cpu_count()
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(tasks))) as executor:
+            futures = [executor.submit(_score_shared_fold, models[name], scoring, shared_folds[fold])
+                       for name, fold in tasks]
+            return [future.result() for future in futures]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def _score_shared_fold(model, scoring, shared_arrays):
+    blocks = []
+    arrays = [_attach(spec, blocks) for spec in shared_arrays]
+    try:
+        return _score_fold(model, scoring, *arrays)
+    finally:
+        # The views must go before their blocks can be unmapped
+        del arrays
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass
+
+
+def _share(array, blocks):
+    # A picklable description of array, with its buffers copied to shared memory
+    if sparse.issparse(array):
+        array = sparse.csr_matrix(array)
+        return ("csr", array.shape, [_share(part, blocks) for part in (array.data, array.indices, array.indptr)])
+    array = np.ascontiguousarray(array)
+    if array.dtype.hasobject:
+        return ("inline", array)
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocks.append(block)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return ("shared", block.name, array.shape, array.dtype.str)
+
+
+def _attach(spec, blocks):
+    if spec[0] == "csr":
+        _, shape, parts = spec
+        return sparse.csr_matrix(tuple(_attach(part, blocks) for part in parts), shape=shape)
+    if spec[0] == "inline":
+        return spec[1]
+    _, name, shape, dtype = spec
+    block = SharedMemory(name=name)
+    blocks.append(block)
+    array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    array.flags.writeable = False
+    return array
+
+
+def _take_rows(X, rows):
+    return X.iloc[rows] if isinstance(X, (pd.DataFrame, pd.Series)) else X[rows]
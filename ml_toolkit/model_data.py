@@ -0,0 +1,49 @@
+"""
+Storage for the customer level model datasets.
+
+abc_regression_modelling, regression_scoring and abc_classification_modelling
+used to be whole-DataFrame pickles, so every script paid a full
+deserialisation into a private copy. They are now kept as column store tables
+under data/model_data/: loading memory maps the columns (zero-copy, shared
+page cache) and only reads the columns asked for.
+
+A dataset that only exists as a legacy data/<name>.p pickle is converted the
+first time it is loaded.
+"""
+
+import os
+
+import pandas as pd
+
+from ml_toolkit import column_store
+
+
+DATA_DIR = "data"
+MODEL_DATA_DIR = os.path.join(DATA_DIR, "model_data")
+
+
+def save_model_data(df, name, model_data_dir=MODEL_DATA_DIR):
+    """Store df as the dataset name."""
+    column_store.write_table(df, os.path.join(model_data_dir, name), metadata={"dataset": name})
+
+
+def load_model_data(name, columns=None, exclude=None, model_data_dir=MODEL_DATA_DIR, data_dir=DATA_DIR):
+    """
+    Load the dataset name.
+
+    columns keeps only the listed columns; exclude drops the listed ones
+    without ever reading them, e.g. exclude=["customer_id"].
+    """
+    table_path = os.path.join(model_data_dir, name)
+    if not os.path.exists(os.path.join(table_path, column_store.SCHEMA_FILE)):
+        pickle_path = os.path.join(data_dir, f"{name}.p")
+        if not os.path.exists(pickle_path):
+            raise FileNotFoundError(f"No model dataset named {name!r} in {model_data_dir} or {data_dir}")
+        save_model_data(pd.read_pickle(pickle_path), name, model_data_dir)
+
+    if exclude is not None:
+        if columns is None:
+            columns = [entry["name"] for entry in column_store.read_schema(table_path)["columns"]]
+        columns = [column for column in columns if column not in exclude]
+
+    return column_store.read_table(table_path, columns=columns)
@@ -0,0 +1,153 @@
+"""
+Linear regression kept up to date with rank-k updates instead of refits.
+
+Retraining on the full history costs O(n p^2) every time a week of labelled
+rows arrives. OnlineLinearRegression keeps the upper Cholesky factor R of
+A'A, where A is X with a column of ones for the intercept (plus the ridge
+penalty), together with A'y. Absorbing k new rows is a QR factorisation of R
+stacked on top of them, and removing k expired rows is the block downdate
+
+    R'R - B'B = R'(I - W W')R,  with W = R'^-1 B',
+
+so R becomes chol(I - W W')' R. Either costs O(k p^2 + p^3), whatever the
+number of rows seen so far. With window set, the most recent window batches
+are kept and older ones are removed as new ones come in. save and load
+persist the state (and the batches of the window) between runs.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import linalg
+
+
+class OnlineLinearRegression:
+    """
+    LinearRegression (alpha=0) or Ridge(alpha) updated batch by batch.
+
+    The coefficients match a fit on every row absorbed and not removed. window
+    is the number of most recent partial_fit batches to keep (None keeps all).
+    """
+
+    def __init__(self, alpha=0.0, fit_intercept=True, window=None):
+        self.alpha = alpha
+        self.fit_intercept = fit_intercept
+        self.window = window
+        self.factor_ = None
+        self.moments_ = None
+        self.n_samples_seen_ = 0
+        self.batches_ = []
+        self.feature_names_in_ = None
+
+    def partial_fit(self, X, y):
+        """Absorb a batch of rows (a rank-k update) and refit."""
+        if self.feature_names_in_ is None and isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        design, y = self._design(X, y)
+        if self.factor_ is None:
+            self._initialise(design.shape[1])
+
+        stacked = np.vstack([self.factor_, design])
+        self.factor_ = linalg.qr(stacked, mode="r", overwrite_a=True)[0][:design.shape[1]]
+        self.moments_ = self.moments_ + design.T @ y
+        self.n_samples_seen_ += len(y)
+
+        if self.window is not None:
+            self.batches_.append((np.asarray(X, dtype=float), y))
+            while len(self.batches_) > self.window:
+                self._downdate(*self.batches_.pop(0))
+        self._solve()
+        return self
+
+    def forget(self, X, y):
+        """Remove rows absorbed earlier (a rank-k downdate) and refit."""
+        self._downdate(np.asarray(X, dtype=float), np.asarray(y, dtype=float).ravel())
+        self._solve()
+        return self
+
+    def fit(self, X, y):
+        self.factor_ = None
+        self.batches_ = []
+        self.n_samples_seen_ = 0
+        return self.partial_fit(X, y)
+
+    def predict(self, X):
+        return np.asarray(X, dtype=float) @ self.coef_ + self.intercept_
+
+    def score(self, X, y):
+        """R-squared of the predictions for X."""
+        y = np.asarray(y, dtype=float).ravel()
+        residuals = y - self.predict(X)
+        return 1 - residuals @ residuals / np.sum((y - y.mean()) ** 2)
+
+    def save(self, path):
+        """Write the state (and the batches of the window) to the .npz file at path."""
+        arrays = {"factor": self.factor_, "moments": self.moments_, "n_samples_seen": self.n_samples_seen_,
+                  "settings": np.array([self.alpha, self.fit_intercept,
+                                        -1 if self.window is None else self.window], dtype=float)}
+        if self.feature_names_in_ is not None:
+            arrays["feature_names"] = self.feature_names_in_.astype(str)
+        for position, (X, y) in enumerate(self.batches_):
+            arrays[f"batch_X_{position}"] = X
+            arrays[f"batch_y_{position}"] = y
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a model written by save."""
+        with np.load(path) as arrays:
+            alpha, fit_intercept, window = arrays["settings"]
+            model = cls(alpha=alpha, fit_intercept=bool(fit_intercept), window=None if window < 0 else int(window))
+            model.factor_ = arrays["factor"]
+            model.moments_ = arrays["moments"]
+            model.n_samples_seen_ = int(arrays["n_samples_seen"])
+            if "feature_names" in arrays:
+                model.feature_names_in_ = arrays["feature_names"].astype(object)
+            n_batches = sum(name.startswith("batch_X_") for name in arrays.files)
+            model.batches_ = [(arrays[f"batch_X_{position}"], arrays[f"batch_y_{position}"])
+                              for position in range(n_batches)]
+        model._solve()
+        return model
+
+    def _design(self, X, y):
+        X = np.asarray(X, dtype=float)
+        if self.fit_intercept:
+            X = np.hstack([X, np.ones((len(X), 1))])
+        return X, np.asarray(y, dtype=float).ravel()
+
+    def _initialise(self, n_columns):
+        # The ridge penalty as rows of the factor; the intercept is not penalised
+        penalty = np.full(n_columns, np.sqrt(self.alpha))
+        if self.fit_intercept:
+            penalty[-1] = 0.0
+        self.factor_ = np.diag(penalty)
+        self.moments_ = np.zeros(n_columns)
+
+    def _downdate(self, X, y):
+        design, y = self._design(X, y)
+        projected = linalg.solve_triangular(self.factor_, design.T, trans="T")
+        try:
+            shrink = linalg.cholesky(np.eye(len(projected)) - projected @ projected.T, lower=True)
+        except linalg.LinAlgError:
+            raise ValueError("Removing these rows leaves too few rows to fit the model") from None
+        self.factor_ = shrink.T @ self.factor_
+        self.moments_ = self.moments_ - design.T @ y
+        self.n_samples_seen_ -= len(y)
+
+    def _solve(self):
+        diagonal = np.abs(np.diag(self.factor_))
+        if diagonal.min() > diagonal.max() * 1e-10:
+            solution = linalg.cho_solve((self.factor_, False), self.moments_)
+        else:
+            # Rank deficient (too few or collinear rows): a minimum norm solution
+            solution = linalg.lstsq(self.factor_.T @ self.factor_, self.moments_)[0]
+        if self.fit_intercept:
+            self.coef_, self.intercept_ = solution[:-1], solution[-1]
+        else:
+            self.coef_, self.intercept_ = solution, 0.0
+        self.n_features_in_ = len(self.coef_)
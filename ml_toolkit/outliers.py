@@ -0,0 +1,126 @@
+"""
+Box plot (IQR) and standard deviation outlier filtering over several columns.
+
+The borders of every column are computed in one vectorised pass over a numpy
+block, combined into a single boolean mask and applied once, instead of
+dropping rows from the DataFrame column by column. sequential=True reproduces
+the old column by column behaviour, where the borders of a column are computed
+on the rows left after the earlier columns were filtered.
+
+For tables that do not fit in memory the filter runs as a two pass streaming
+job over an iterable of DataFrame chunks: streaming_outlier_borders builds
+the borders (IQR borders from QuantileSketches, standard deviation borders
+from mergeable RunningStats), then filter_chunks drops the outliers chunk
+by chunk.
+"""
+
+import numpy as np
+
+from ml_toolkit.quantile_sketch import QuantileSketch
+from ml_toolkit.scaling import RunningStats
+
+
+def outlier_borders(values, method="iqr", factor=1.5):
+    """
+    Return (min_borders, max_borders) for each column of the 2d array values.
+
+    method "iqr" gives quartile -/+ factor * IQR, method "std" gives
+    mean -/+ factor * standard deviation. Missing values are ignored, as in
+    Series.quantile / Series.std.
+    """
+    if method == "iqr":
+        lower_quartile, upper_quartile = np.nanquantile(values, [0.25, 0.75], axis=0)
+        extended_iqr = (upper_quartile - lower_quartile) * factor
+        return lower_quartile - extended_iqr, upper_quartile + extended_iqr
+
+    if method == "std":
+        mean = np.nanmean(values, axis=0)
+        std_dev = np.nanstd(values, axis=0, ddof=1)
+        return mean - std_dev * factor, mean + std_dev * factor
+
+    raise ValueError(f"method must be 'iqr' or 'std', got {method!r}")
+
+
+def outlier_mask(df, columns, method="iqr", factor=1.5, sequential=False, verbose=True):
+    """
+    Return a boolean array that is True for the rows of df to keep.
+
+    A row is an outlier if any of columns falls outside its borders; missing
+    values never count as outliers. With verbose the number of outliers found
+    in each column is printed.
+    """
+    values = df[columns].to_numpy(dtype=float)
+
+    if not sequential:
+        min_borders, max_borders = outlier_borders(values, method, factor)
+        with np.errstate(invalid="ignore"):
+            is_outlier = (values < min_borders) | (values > max_borders)
+        if verbose:
+            for column, count in zip(columns, is_outlier.sum(axis=0)):
+                print(f"{count} Outliers detected in column {column}")
+        return ~is_outlier.any(axis=1)
+
+    keep = np.ones(len(values), dtype=bool)
+    for position, column in enumerate(columns):
+        column_values = values[:, position]
+        min_border, max_border = outlier_borders(column_values[keep, None], method, factor)
+        with np.errstate(invalid="ignore"):
+            is_outlier = keep & ((column_values < min_border[0]) | (column_values > max_border[0]))
+        if verbose:
+            print(f"{is_outlier.sum()} Outliers detected in column {column}")
+        keep &= ~is_outlier
+    return keep
+
+
+def remove_outliers(df, columns, method="iqr", factor=1.5, sequential=False, verbose=True):
+    """Return df without the rows flagged by outlier_mask."""
+    return df[outlier_mask(df, columns, method, factor, sequential, verbose)]
+
+
+def sketch_columns(chunks, columns, k=200, seed=None):
+    """
+    First pass of the streaming IQR filter: one QuantileSketch per column.
+
+    Sketches built by separate workers on separate chunks can be combined with
+    QuantileSketch.merge before calling sketch_borders.
+    """
+    sketches = [QuantileSketch(k, seed) for _ in columns]
+    for chunk in chunks:
+        for sketch, column in zip(sketches, columns):
+            sketch.update(chunk[column].to_numpy(dtype=float))
+    return sketches
+
+
+def sketch_borders(sketches, factor=1.5):
+    """IQR (min_borders, max_borders) from per column QuantileSketches."""
+    quartiles = np.array([sketch.quantile([0.25, 0.75]) for sketch in sketches])
+    extended_iqr = (quartiles[:, 1] - quartiles[:, 0]) * factor
+    return quartiles[:, 0] - extended_iqr, quartiles[:, 1] + extended_iqr
+
+
+def streaming_outlier_borders(chunks, columns, method="iqr", factor=1.5, k=200):
+    """
+    First pass of the streaming filter: (min_borders, max_borders) of columns
+    over all chunks, using constant memory per column.
+    """
+    if method == "iqr":
+        return sketch_borders(sketch_columns(chunks, columns, k), factor)
+
+    if method == "std":
+        stats = RunningStats(len(columns))
+        for chunk in chunks:
+            stats.update(chunk[columns].to_numpy(dtype=float))
+        mean = stats.mean
+        std_dev = np.sqrt(stats.variance(ddof=1))
+        return mean - std_dev * factor, mean + std_dev * factor
+
+    raise ValueError(f"method must be 'iqr' or 'std', got {method!r}")
+
+
+def filter_chunks(chunks, columns, min_borders, max_borders):
+    """Second pass of the streaming filter: yield each chunk without its outliers."""
+    for chunk in chunks:
+        values = chunk[columns].to_numpy(dtype=float)
+        with np.errstate(invalid="ignore"):
+            is_outlier = (values < min_borders) | (values > max_borders)
+        yield chunk[~is_outlier.any(axis=1)]
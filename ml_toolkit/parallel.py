@@ -0,0 +1,56 @@
+"""
+Run chunk or fold level tasks in a process pool.
+
+Worker processes re-import the calling script on platforms that spawn them
+(Windows, macOS), so only use n_jobs != 1 from code guarded by
+if __name__ == "__main__".
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+def fold_tasks(tasks, combine, n_jobs=1, initial=None):
+    """
+    Run each (function, *args) task in tasks and fold the results with combine.
+
+    combine(accumulated, result) must be associative and commutative, because
+    results are folded in completion order; accumulated starts as initial.
+    Only a couple of tasks per worker are in flight at any time, so memory
+    stays bounded when tasks carry data. n_jobs is the number of worker
+    processes; 1 runs everything in this process and None or -1 uses every
+    core.
+    """
+    accumulated = initial
+
+    if n_jobs == 1:
+        for function, *args in tasks:
+            accumulated = combine(accumulated, function(*args))
+        return accumulated
+
+    n_workers = n_jobs if n_jobs and n_jobs > 0 else os.cpu_count()
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        max_pending = 2 * n_workers
+        pending = set()
+        for function, *args in tasks:
+            pending.add(executor.submit(function, *args))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    accumulated = combine(accumulated, future.result())
+        for future in pending:
+            accumulated = combine(accumulated, future.result())
+
+    return accumulated
+
+
+def map_tasks(tasks, n_jobs=1):
+    """Run each (function, *args) task and return the results in task order."""
+    tasks = list(tasks)
+    if n_jobs == 1:
+        return [function(*args) for function, *args in tasks]
+
+    n_workers = n_jobs if n_jobs and n_jobs > 0 else os.cpu_count()
+    with ProcessPoolExecutor(max_workers=min(n_workers, max(len(tasks), 1))) as executor:
+        futures = [executor.submit(function, *args) for function, *args in tasks]
+        return [future.result() for future in futures]
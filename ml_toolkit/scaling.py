@@ -0,0 +1,168 @@
+"""
+Standardisation and normalisation fitted from mergeable running statistics.
+
+StandardScaler / MinMaxScaler.fit_transform need the whole matrix in memory.
+RunningStats accumulates count, mean, sum of squared deviations, min and max
+per feature over chunks, and partial states built in different processes
+combine with the numerically stable pairwise update of Chan et al. (Welford
+generalised to batches). StreamingScaler fits from those statistics and
+transforms chunk by chunk, either handing chunks to a model or writing them
+to a .npy file on disk, so no step materialises the full matrix.
+
+On in-memory data StreamingScaler matches the scikit-learn scaler it mirrors
+up to floating point rounding. Missing values are ignored when fitting and
+kept when transforming, as in scikit-learn.
+"""
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from ml_toolkit.parallel import fold_tasks
+
+
+class RunningStats:
+    """Per feature count, mean, variance, min and max over chunks of rows."""
+
+    def __init__(self, n_features):
+        self.count = np.zeros(n_features)
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.min = np.full(n_features, np.inf)
+        self.max = np.full(n_features, -np.inf)
+
+    @classmethod
+    def from_chunk(cls, X):
+        """Statistics of one 2d chunk."""
+        X = _as_2d_float(X)
+        stats = cls(X.shape[1])
+        stats.count = np.sum(~np.isnan(X), axis=0).astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stats.mean = np.where(stats.count > 0, np.nansum(X, axis=0) / stats.count, 0.0)
+        stats.m2 = np.nansum((X - stats.mean) ** 2, axis=0)
+        if len(X):
+            stats.min = np.min(np.where(np.isnan(X), np.inf, X), axis=0)
+            stats.max = np.max(np.where(np.isnan(X), -np.inf, X), axis=0)
+        return stats
+
+    def update(self, X):
+        """Add a chunk of rows."""
+        return self.merge(RunningStats.from_chunk(X))
+
+    def merge(self, other):
+        """Combine with the statistics of other rows (Chan et al. pairwise update)."""
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        weight = np.divide(other.count, total, out=np.zeros_like(total), where=total > 0)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * weight
+        self.mean = self.mean + delta * weight
+        self.count = total
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    def variance(self, ddof=0):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.m2 / (self.count - ddof)
+
+
+class StreamingScaler:
+    """
+    StandardScaler (method="standard") or MinMaxScaler (method="minmax",
+    feature_range) that can be fitted chunk by chunk.
+
+    After fitting it exposes the scikit-learn attributes: mean_, var_, scale_,
+    data_min_, data_max_, data_range_, min_ and n_samples_seen_.
+    """
+
+    def __init__(self, method="standard", feature_range=(0, 1)):
+        if method not in ("standard", "minmax"):
+            raise ValueError(f"method must be 'standard' or 'minmax', got {method!r}")
+        self.method = method
+        self.feature_range = feature_range
+        self.stats_ = None
+
+    def partial_fit(self, X):
+        """Fold one chunk of rows into the fitted statistics."""
+        return self.merge_stats(RunningStats.from_chunk(X))
+
+    def merge_stats(self, stats):
+        """Fold RunningStats built elsewhere (another chunk, process or node)."""
+        self.stats_ = stats if self.stats_ is None else self.stats_.merge(stats)
+        self._set_attributes()
+        return self
+
+    def fit(self, X):
+        self.stats_ = None
+        return self.partial_fit(X)
+
+    def fit_chunks(self, chunks, n_jobs=1):
+        """
+        Fit from an iterable of chunks, computing their statistics in n_jobs
+        worker processes (see ml_toolkit.parallel).
+        """
+        self.stats_ = None
+        stats = fold_tasks(((RunningStats.from_chunk, chunk) for chunk in chunks), _merge_stats, n_jobs)
+        if stats is None:
+            raise ValueError("No chunks to fit on")
+        return self.merge_stats(stats)
+
+    def transform(self, X):
+        X = _as_2d_float(X)
+        if self.method == "standard":
+            return (X - self.mean_) / self.scale_
+        return X * self.scale_ + self.min_
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+    def transform_chunks(self, chunks):
+        """Yield each chunk transformed, e.g. to feed a model's partial_fit."""
+        for chunk in chunks:
+            yield self.transform(chunk)
+
+    def transform_to_npy(self, chunks, path, n_rows):
+        """
+        Write the transformed chunks (n_rows rows in total) to the .npy file
+        at path and return it as a read-only memory map.
+        """
+        output = open_memmap(path, mode="w+", dtype=np.float64, shape=(n_rows, len(self.stats_.count)))
+        start = 0
+        for transformed in self.transform_chunks(chunks):
+            output[start:start + len(transformed)] = transformed
+            start += len(transformed)
+        if start != n_rows:
+            raise ValueError(f"Expected {n_rows} rows, got {start}")
+        output.flush()
+        del output
+        return np.load(path, mmap_mode="r")
+
+    def _set_attributes(self):
+        stats = self.stats_
+        self.n_samples_seen_ = stats.count.astype(np.int64)
+        if self.method == "standard":
+            self.mean_ = stats.mean.copy()
+            self.var_ = stats.variance()
+            self.scale_ = _handle_zeros_in_scale(np.sqrt(self.var_))
+        else:
+            feature_min, feature_max = self.feature_range
+            self.data_min_ = stats.min.copy()
+            self.data_max_ = stats.max.copy()
+            self.data_range_ = self.data_max_ - self.data_min_
+            self.scale_ = (feature_max - feature_min) / _handle_zeros_in_scale(self.data_range_)
+            self.min_ = feature_min - self.data_min_ * self.scale_
+
+
+def _merge_stats(accumulated, stats):
+    return stats if accumulated is None else accumulated.merge(stats)
+
+
+def _handle_zeros_in_scale(scale):
+    # Constant features are left unscaled, as in scikit-learn
+    scale = np.array(scale, dtype=float)
+    scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+    return scale
+
+
+def _as_2d_float(X):
+    X = np.asarray(X, dtype=float)
+    return X.reshape(-1, 1) if X.ndim == 1 else X
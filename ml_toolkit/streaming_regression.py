@@ -0,0 +1,180 @@
+"""
+Least squares and ridge regression fitted out of core.
+
+LinearRegression and Ridge need the whole design matrix in memory. Their
+solution only depends on the count, the means and the centred cross-products
+X'X and X'y, so GramStats accumulates those chunk by chunk; partial
+statistics from different processes (or machines) combine exactly with the
+pairwise update of Chan et al. StreamingLinearRegression then solves the
+p x p normal equations by Cholesky, falling back to the minimum norm
+least squares solution (the one LinearRegression returns) when X'X is
+singular. Memory is O(p^2) whatever the number of rows, so a CSV file or a
+column store table is bounded by disk rather than RAM.
+"""
+
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import linalg
+
+from ml_toolkit import column_store
+from ml_toolkit.parallel import fold_tasks
+
+
+class GramStats:
+    """Count, means and centred cross-products of the features and the target."""
+
+    def __init__(self, n, x_mean, y_mean, xx, xy, yy):
+        self.n = n
+        self.x_mean = x_mean
+        self.y_mean = y_mean
+        self.xx = xx
+        self.xy = xy
+        self.yy = yy
+
+    @classmethod
+    def from_chunk(cls, X, y):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float).ravel()
+        x_mean = X.mean(axis=0)
+        y_mean = y.mean()
+        X_centred = X - x_mean
+        y_centred = y - y_mean
+        return cls(len(y), x_mean, y_mean, X_centred.T @ X_centred, X_centred.T @ y_centred, y_centred @ y_centred)
+
+    def merge(self, other):
+        # Chan et al. pairwise update of centred cross-products
+        n = self.n + other.n
+        x_delta = other.x_mean - self.x_mean
+        y_delta = other.y_mean - self.y_mean
+        factor = self.n * other.n / n
+        self.xx = self.xx + other.xx + np.outer(x_delta, x_delta) * factor
+        self.xy = self.xy + other.xy + x_delta * y_delta * factor
+        self.yy = self.yy + other.yy + y_delta ** 2 * factor
+        self.x_mean = self.x_mean + x_delta * other.n / n
+        self.y_mean = self.y_mean + y_delta * other.n / n
+        self.n = n
+        return self
+
+
+class StreamingLinearRegression:
+    """
+    LinearRegression (alpha=0) or Ridge(alpha) fitted from GramStats.
+
+    Feed it with fit, partial_fit, fit_chunks, fit_source or merge; coef_ and
+    intercept_ are refreshed after each.
+    """
+
+    def __init__(self, alpha=0.0, fit_intercept=True):
+        self.alpha = alpha
+        self.fit_intercept = fit_intercept
+        self.stats_ = None
+        self.feature_names_in_ = None
+
+    def partial_fit(self, X, y):
+        """Fold one chunk of rows into the statistics and refit."""
+        if self.feature_names_in_ is None and isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        return self.merge_stats(GramStats.from_chunk(X, y))
+
+    def merge_stats(self, stats):
+        """Fold GramStats built elsewhere (another chunk, process or node) and refit."""
+        self.stats_ = stats if self.stats_ is None else self.stats_.merge(stats)
+        self._solve()
+        return self
+
+    def merge(self, other):
+        """Fold another StreamingLinearRegression and refit."""
+        if self.feature_names_in_ is None:
+            self.feature_names_in_ = other.feature_names_in_
+        return self.merge_stats(other.stats_)
+
+    def fit(self, X, y):
+        self.stats_ = None
+        return self.partial_fit(X, y)
+
+    def fit_chunks(self, chunks, n_jobs=1):
+        """Fit from an iterable of (X, y) chunks, in n_jobs worker processes (see ml_toolkit.parallel)."""
+        self.stats_ = None
+        self.feature_names_in_ = None
+
+        def tasks():
+            for X, y in chunks:
+                if self.feature_names_in_ is None and isinstance(X, pd.DataFrame):
+                    self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+                yield GramStats.from_chunk, X, y
+
+        stats = fold_tasks(tasks(), _merge_stats, n_jobs)
+        if stats is None:
+            raise ValueError("No chunks to fit on")
+        return self.merge_stats(stats)
+
+    def fit_source(self, source, target, features=None, chunk_size=1_000_000, n_jobs=1):
+        """
+        Fit on the target and features columns (default: every other column)
+        of a .csv file or a column store table directory, chunk_size rows at
+        a time. Column store slices are read by the workers themselves.
+        """
+        if features is None:
+            features = [column for column in _source_columns(source) if column != target]
+        features = list(features)
+
+        if isinstance(source, str) and os.path.isdir(source):
+            n_rows = column_store.read_schema(source)["n_rows"]
+            tasks = ((_table_slice_stats, source, target, features, start, min(start + chunk_size, n_rows))
+                     for start in range(0, n_rows, chunk_size))
+        else:
+            tasks = ((GramStats.from_chunk, chunk[features], chunk[target])
+                     for chunk in pd.read_csv(source, usecols=features + [target], chunksize=chunk_size))
+
+        self.stats_ = None
+        stats = fold_tasks(tasks, _merge_stats, n_jobs)
+        if stats is None:
+            raise ValueError(f"No rows in {source}")
+        self.feature_names_in_ = np.asarray(features, dtype=object)
+        return self.merge_stats(stats)
+
+    def predict(self, X):
+        return np.asarray(X, dtype=float) @ self.coef_ + self.intercept_
+
+    def score(self, X, y):
+        """R-squared of the predictions for X."""
+        y = np.asarray(y, dtype=float).ravel()
+        residuals = y - self.predict(X)
+        return 1 - residuals @ residuals / np.sum((y - y.mean()) ** 2)
+
+    def _solve(self):
+        stats = self.stats_
+        if self.fit_intercept:
+            gram, moments = stats.xx, stats.xy
+        else:
+            # Raw cross-products, recovered from the centred ones
+            gram = stats.xx + stats.n * np.outer(stats.x_mean, stats.x_mean)
+            moments = stats.xy + stats.n * stats.x_mean * stats.y_mean
+
+        gram = gram + self.alpha * np.eye(len(gram))
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", linalg.LinAlgWarning)
+            try:
+                self.coef_ = linalg.cho_solve(linalg.cho_factor(gram), moments)
+            except (linalg.LinAlgError, linalg.LinAlgWarning):
+                self.coef_ = linalg.lstsq(gram, moments)[0]
+        self.intercept_ = stats.y_mean - stats.x_mean @ self.coef_ if self.fit_intercept else 0.0
+        self.n_features_in_ = len(self.coef_)
+
+
+def _merge_stats(accumulated, stats):
+    return stats if accumulated is None else accumulated.merge(stats)
+
+
+def _source_columns(source):
+    if isinstance(source, str) and os.path.isdir(source):
+        return [entry["name"] for entry in column_store.read_schema(source)["columns"]]
+    return list(pd.read_csv(source, nrows=0).columns)
+
+
+def _table_slice_stats(table_path, target, features, start, stop):
+    table = column_store.read_table(table_path, columns=features + [target]).iloc[start:stop]
+    return GramStats.from_chunk(table[features], table[target])
@@ -0,0 +1,105 @@
+"""
+Classification metrics at every decision threshold in one pass.
+
+Scoring a grid of thresholds with precision_score, recall_score and f1_score
+rescans the predictions three times per threshold. threshold_sweep sorts the
+scores of each class once; the true and false positives at any threshold t
+(predicting the positive class when score >= t) are then counts of sorted
+scores at or above t, found by binary search, and every metric follows from
+the four confusion counts as a vector operation. Without a grid it sweeps
+every distinct score.
+
+For scored batches too large to sort, ThresholdHistogram counts positives and
+negatives per score bin. Histograms of different batches (or processes) are
+added together, and the sweep at the bin edges is exact for those
+thresholds.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def threshold_sweep(y_true, y_score, thresholds=None, utility_weights=None):
+    """
+    Confusion counts, precision, recall, f1 and accuracy at each threshold.
+
+    y_true holds 0/1 (or boolean) labels. thresholds defaults to every
+    distinct score. utility_weights, a dict of value per "tp", "fp", "fn"
+    and "tn" (missing counts are worth 0), adds a utility column with the
+    total value of the predictions. Returns a DataFrame ordered by threshold.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score, dtype=float)
+    positive_scores = np.sort(y_score[y_true])
+    negative_scores = np.sort(y_score[~y_true])
+
+    thresholds = np.unique(y_score) if thresholds is None else np.sort(np.asarray(thresholds, dtype=float))
+    tp = len(positive_scores) - np.searchsorted(positive_scores, thresholds, side="left")
+    fp = len(negative_scores) - np.searchsorted(negative_scores, thresholds, side="left")
+    return _sweep_table(thresholds, tp, fp, len(positive_scores), len(negative_scores), utility_weights)
+
+
+def best_threshold(sweep, metric="f1"):
+    """The threshold with the highest metric in a sweep (the lowest one on ties)."""
+    sweep = sweep.sort_values("threshold", kind="stable")
+    return sweep["threshold"].iloc[np.argmax(sweep[metric].to_numpy())]
+
+
+class ThresholdHistogram:
+    """
+    Positive and negative counts per score bin, for sweeping thresholds over
+    scores that arrive in batches. Bins split range into n_bins equal parts;
+    scores outside range go to the first or last bin.
+    """
+
+    def __init__(self, n_bins=1000, range=(0.0, 1.0)):
+        self.n_bins = n_bins
+        self.range = range
+        self.edges_ = np.linspace(range[0], range[1], n_bins + 1)
+        self.positive_counts_ = np.zeros(n_bins, dtype=np.int64)
+        self.negative_counts_ = np.zeros(n_bins, dtype=np.int64)
+
+    def update(self, y_true, y_score):
+        """Add a batch of labels and scores."""
+        y_true = np.asarray(y_true).astype(bool)
+        # Bin k holds edges[k] <= score < edges[k + 1], so score >= edges[k] exactly when its bin is >= k
+        bins = np.clip(np.searchsorted(self.edges_, np.asarray(y_score, dtype=float), side="right") - 1,
+                       0, self.n_bins - 1)
+        self.positive_counts_ += np.bincount(bins[y_true], minlength=self.n_bins)
+        self.negative_counts_ += np.bincount(bins[~y_true], minlength=self.n_bins)
+        return self
+
+    def merge(self, other):
+        """Add the counts of a histogram with the same bins."""
+        if not np.array_equal(self.edges_, other.edges_):
+            raise ValueError("Histograms must have the same bins to merge")
+        self.positive_counts_ += other.positive_counts_
+        self.negative_counts_ += other.negative_counts_
+        return self
+
+    def sweep(self, utility_weights=None):
+        """threshold_sweep at the lower edge of every bin."""
+        tp = np.cumsum(self.positive_counts_[::-1])[::-1]
+        fp = np.cumsum(self.negative_counts_[::-1])[::-1]
+        return _sweep_table(self.edges_[:-1], tp, fp, self.positive_counts_.sum(), self.negative_counts_.sum(),
+                            utility_weights)
+
+
+def _sweep_table(thresholds, tp, fp, positives, negatives, utility_weights):
+    fn = positives - tp
+    tn = negatives - fp
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Undefined ratios are 0, as with zero_division=0
+        precision = np.nan_to_num(tp / (tp + fp))
+        recall = np.nan_to_num(tp / positives) * np.ones(len(tp))
+        f1 = np.nan_to_num(2 * tp / (2 * tp + fp + fn))
+        accuracy = np.nan_to_num((tp + tn) / (positives + negatives)) * np.ones(len(tp))
+
+    sweep = pd.DataFrame({"threshold": thresholds, "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+                          "precision": precision, "recall": recall, "f1": f1, "accuracy": accuracy})
+    if utility_weights is not None:
+        unknown = set(utility_weights) - {"tp", "fp", "fn", "tn"}
+        if unknown:
+            raise ValueError(f"utility_weights keys must be 'tp', 'fp', 'fn' or 'tn', got {sorted(unknown)}")
+        sweep["utility"] = sum(weight * sweep[count] for count, weight in utility_weights.items())
+    return sweep
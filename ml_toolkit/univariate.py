@@ -0,0 +1,196 @@
+"""
+Univariate feature screening from mergeable sufficient statistics.
+
+SelectKBest(f_regression) / SelectKBest(chi2) need the whole matrix, and the
+summary table used to be assembled from three single column DataFrames.
+UnivariateScreen scores every feature with a couple of BLAS matrix products
+per chunk of rows: centred cross-products with the target for the F test,
+per class feature sums for chi2. The statistics of chunks (or of worker
+processes) merge exactly, so tens of thousands of candidate features can be
+screened without ever holding the full matrix. Scores and p-values match
+f_regression and chi2.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from ml_toolkit.parallel import fold_tasks
+
+
+class UnivariateScreen:
+    """
+    Score features against the target with test="f_regression" or "chi2".
+
+    Feed it with fit, partial_fit, fit_chunks or merge, then call summary.
+    """
+
+    def __init__(self, test="f_regression"):
+        if test not in ("f_regression", "chi2"):
+            raise ValueError(f"test must be 'f_regression' or 'chi2', got {test!r}")
+        self.test = test
+        self.stats_ = None
+        self.feature_names_ = None
+
+    def partial_fit(self, X, y):
+        """Fold one chunk of rows into the statistics."""
+        if self.feature_names_ is None and isinstance(X, pd.DataFrame):
+            self.feature_names_ = list(X.columns)
+        return self.merge_stats(chunk_stats(self.test, X, y))
+
+    def merge_stats(self, chunk):
+        """Fold statistics computed elsewhere with chunk_stats."""
+        self.stats_ = chunk if self.stats_ is None else self.stats_.merge(chunk)
+        return self
+
+    def merge(self, other):
+        """Fold another UnivariateScreen with the same test."""
+        if self.feature_names_ is None:
+            self.feature_names_ = other.feature_names_
+        return self.merge_stats(other.stats_)
+
+    def fit(self, X, y):
+        self.stats_ = None
+        return self.partial_fit(X, y)
+
+    def fit_chunks(self, chunks, n_jobs=1):
+        """Fit from an iterable of (X, y) chunks, in n_jobs worker processes (see ml_toolkit.parallel)."""
+        self.stats_ = None
+        self.feature_names_ = None
+
+        def tasks():
+            for X, y in chunks:
+                if self.feature_names_ is None and isinstance(X, pd.DataFrame):
+                    self.feature_names_ = list(X.columns)
+                yield chunk_stats, self.test, X, y
+
+        return self.merge_stats(fold_tasks(tasks(), _merge, n_jobs))
+
+    def scores(self):
+        """Return (scores, p_values) arrays in feature order."""
+        return self.stats_.scores()
+
+    def summary(self, feature_names=None):
+        """
+        DataFrame of input_variable, p_value and f_score (or chi2_score),
+        sorted by p_value.
+        """
+        scores, p_values = self.scores()
+        if feature_names is None:
+            feature_names = self.feature_names_ if self.feature_names_ is not None else range(len(scores))
+        score_column = "f_score" if self.test == "f_regression" else "chi2_score"
+        summary_stats = pd.DataFrame({"input_variable": feature_names, "p_value": p_values, score_column: scores})
+        return summary_stats.sort_values(by="p_value", kind="stable")
+
+
+def select_features(summary_stats, p_value_threshold=0.05, score_threshold=5):
+    """Names of the features passing both thresholds of a UnivariateScreen summary."""
+    score_column = summary_stats.columns[2]
+    selected = (summary_stats[score_column] >= score_threshold) & (summary_stats["p_value"] <= p_value_threshold)
+    return summary_stats.loc[selected, "input_variable"].tolist()
+
+
+def chunk_stats(test, X, y):
+    """Sufficient statistics of one chunk for test."""
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y)
+    if test == "f_regression":
+        return RegressionStats.from_chunk(X, y.astype(float))
+    return ClassCountStats.from_chunk(X, y)
+
+
+class RegressionStats:
+    """Count, means and centred (co)variances of each feature with the target."""
+
+    def __init__(self, n, x_mean, y_mean, xx, yy, xy):
+        self.n = n
+        self.x_mean = x_mean
+        self.y_mean = y_mean
+        self.xx = xx
+        self.yy = yy
+        self.xy = xy
+
+    @classmethod
+    def from_chunk(cls, X, y):
+        x_mean = X.mean(axis=0)
+        y_mean = y.mean()
+        X_centred = X - x_mean
+        y_centred = y - y_mean
+        return cls(len(y), x_mean, y_mean,
+                   np.einsum("ij,ij->j", X_centred, X_centred),
+                   y_centred @ y_centred,
+                   X_centred.T @ y_centred)
+
+    def merge(self, other):
+        # Chan et al. pairwise update of centred cross-products
+        n = self.n + other.n
+        x_delta = other.x_mean - self.x_mean
+        y_delta = other.y_mean - self.y_mean
+        factor = self.n * other.n / n
+        self.xx = self.xx + other.xx + x_delta ** 2 * factor
+        self.yy = self.yy + other.yy + y_delta ** 2 * factor
+        self.xy = self.xy + other.xy + x_delta * y_delta * factor
+        self.x_mean = self.x_mean + x_delta * other.n / n
+        self.y_mean = self.y_mean + y_delta * other.n / n
+        self.n = n
+        return self
+
+    def scores(self):
+        # As f_regression(force_finite=True): constant features score 0 (p=1),
+        # perfectly correlated ones the largest float (p=0)
+        degrees_of_freedom = self.n - 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = self.xy / np.sqrt(self.xx * self.yy)
+            correlation_squared = correlation ** 2
+            f_scores = correlation_squared / (1 - correlation_squared) * degrees_of_freedom
+        p_values = stats.f.sf(f_scores, 1, degrees_of_freedom)
+
+        is_constant = ~np.isfinite(correlation)
+        is_perfect = np.isinf(f_scores)
+        f_scores[is_constant] = 0.0
+        p_values[is_constant] = 1.0
+        f_scores[is_perfect] = np.finfo(f_scores.dtype).max
+        p_values[is_perfect] = 0.0
+        return f_scores, p_values
+
+
+class ClassCountStats:
+    """Row count and feature sums per class, the inputs of the chi2 test."""
+
+    def __init__(self, classes, class_counts, class_sums):
+        self.classes = classes
+        self.class_counts = class_counts
+        self.class_sums = class_sums
+
+    @classmethod
+    def from_chunk(cls, X, y):
+        if (X < 0).any():
+            raise ValueError("chi2 needs non-negative feature values")
+        classes, class_ids = np.unique(y, return_inverse=True)
+        class_indicator = np.zeros((len(classes), len(y)))
+        class_indicator[class_ids.ravel(), np.arange(len(y))] = 1
+        return cls(classes, class_indicator.sum(axis=1), class_indicator @ X)
+
+    def merge(self, other):
+        classes = np.union1d(self.classes, other.classes)
+        class_counts = np.zeros(len(classes))
+        class_sums = np.zeros((len(classes), self.class_sums.shape[1]))
+        for part in (self, other):
+            positions = np.searchsorted(classes, part.classes)
+            class_counts[positions] += part.class_counts
+            class_sums[positions] += part.class_sums
+        self.classes, self.class_counts, self.class_sums = classes, class_counts, class_sums
+        return self
+
+    def scores(self):
+        feature_totals = self.class_sums.sum(axis=0)
+        class_share = self.class_counts / self.class_counts.sum()
+        expected = np.outer(class_share, feature_totals)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            chi2_scores = ((self.class_sums - expected) ** 2 / expected).sum(axis=0)
+        p_values = stats.chi2.sf(chi2_scores, len(self.classes) - 1)
+        return chi2_scores, p_values
+
+
+def _merge(accumulated, chunk):
+    return chunk if accumulated is None else accumulated.merge(chunk)